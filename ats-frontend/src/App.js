@@ -82,11 +82,13 @@ function App() {
         formData.append('file', selectedFile);
         formData.append('job_description', jobDescription);
         try {
-            const response = await axios.post(`${API_BASE_URL}/analyze`, formData, {
+            // /report parses the file once and returns the analysis and summary together
+            const response = await axios.post(`${API_BASE_URL}/report`, formData, {
                 headers: { 'Content-Type': 'multipart/form-data' },
                 timeout: 60000,
             });
             setAnalysisResults(response.data);
+            setSummary(response.data.summary);
             setLoading(false);
         } catch (err) {
             console.error('Error analyzing resume:', err);
@@ -1,13 +1,38 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Request, Response, request, jsonify, current_app, g, has_app_context, stream_with_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
+import gc
+import multiprocessing
+import hashlib
+import io
+import itertools
+import json
+import logging
 import os
+import random
+import tempfile
+import threading
+import time
+import zipfile
+import xml.etree.ElementTree as ET
 import PyPDF2
-import docx
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import cached_property, wraps
 import re
+import numpy as np
 import spacy
-from spacy.matcher import Matcher
+
+from cache import LRUCache, TextCache, file_digest
+from candidates import CandidateIndex, CandidateMatrix, CandidateStore, parse_query
+from dedupe import LSHIndex, MinHasher
+from jobs import JobStore
+from metrics import SIZE_BUCKETS, MetricsRegistry
+from profiling import RequestProfiler
+from roles import RoleRegistry, RoleStore
+from skill_index import popcount
+from taxonomy import TaxonomyLoader
 
 app = Flask(__name__)
 # Enable CORS for all routes and origins, allowing credentials and all methods
@@ -23,266 +48,658 @@ CORS(
     }
 )
 
-UPLOAD_FOLDER = 'uploads'
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
+# --- Metrics & Logging ---
+# Stage timers and size histograms feed /metrics. Debug logging is off unless
+# LOG_LEVEL=DEBUG, and even then only a LOG_SAMPLE_RATE fraction of analyses
+# is logged, as one JSON line each.
+metrics = MetricsRegistry()
+STAGE_SECONDS = metrics.histogram('ats_stage_seconds', 'Wall time of each processing stage.', ('stage',))
+REQUEST_SECONDS = metrics.histogram('ats_request_seconds', 'Request latency by endpoint and status.',
+                                    ('endpoint', 'status'))
+UPLOAD_BYTES = metrics.histogram('ats_upload_bytes', 'Size of uploaded resumes.', ('format',), SIZE_BUCKETS)
+TEXT_CHARS = metrics.histogram('ats_text_chars', 'Characters of text extracted per resume.', ('format',),
+                               SIZE_BUCKETS)
+
+app.config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL', 'WARNING').upper()
+app.config['LOG_SAMPLE_RATE'] = float(os.environ.get('LOG_SAMPLE_RATE', 0.01))
+logging.basicConfig(format='%(asctime)s %(levelname)s %(name)s %(message)s')
+logger = logging.getLogger('ats')
+logger.setLevel(app.config['LOG_LEVEL'])
+
+def should_log(level=logging.DEBUG):
+    """True for a LOG_SAMPLE_RATE fraction of calls when ``level`` is enabled.
+
+    Check it before building the log fields so unsampled calls cost nothing.
+    """
+    return logger.isEnabledFor(level) and random.random() < app.config['LOG_SAMPLE_RATE']
+
+def log_event(event, level=logging.DEBUG, **fields):
+    logger.log(level, json.dumps({'event': event, **fields}, default=sorted))
 
 ALLOWED_EXTENSIONS = {'pdf', 'docx'}
 app.config['ALLOWED_EXTENSIONS'] = ALLOWED_EXTENSIONS
 
+# Uploads are parsed straight from the request stream. Only files larger than
+# this many bytes spill over to an anonymous (unique, auto-deleted) temp file.
+app.config['MAX_IN_MEMORY_UPLOAD'] = int(os.environ.get('MAX_IN_MEMORY_UPLOAD', 4 * 1024 * 1024))
+
+
+class SpooledUpload(tempfile.SpooledTemporaryFile):
+    """SpooledTemporaryFile with the IOBase capability checks it lacks before Python 3.11.
+
+    zipfile (and so DOCX parsing) calls ``seekable()`` on the stream it is given.
+    """
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def writable(self):
+        return True
+
+
+class UploadRequest(Request):
+    """Request that buffers uploaded files in memory up to MAX_IN_MEMORY_UPLOAD."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        max_size = current_app.config['MAX_IN_MEMORY_UPLOAD']
+        return SpooledUpload(max_size=max_size, mode='rb+')
+
+    def _load_form_data(self):
+        with STAGE_SECONDS.time('upload'):
+            super()._load_form_data()
+
+
+app.request_class = UploadRequest
+
+# --- Extracted Text Cache ---
+# Keyed by a hash of the uploaded bytes, so re-uploading the same resume skips
+# PDF/DOCX parsing. TEXT_CACHE_PATH enables a SQLite tier shared across workers.
+# Bump EXTRACTOR_VERSION whenever extraction output changes to orphan old rows.
+EXTRACTOR_VERSION = 4
+app.config['TEXT_CACHE_MAX_BYTES'] = int(os.environ.get('TEXT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+app.config['TEXT_CACHE_PATH'] = os.environ.get('TEXT_CACHE_PATH') or None
+app.config['TEXT_CACHE_DISK_MAX_BYTES'] = int(os.environ.get('TEXT_CACHE_DISK_MAX_BYTES', 512 * 1024 * 1024))
+
+# PDF_MAX_PAGES caps how many pages are read (0 = all). With PDF_WORKERS > 1,
+# documents of at least PDF_PARALLEL_MIN_PAGES pages are parsed page-parallel.
+app.config['PDF_MAX_PAGES'] = int(os.environ.get('PDF_MAX_PAGES', 0))
+app.config['PDF_WORKERS'] = int(os.environ.get('PDF_WORKERS', 0))
+app.config['PDF_PARALLEL_MIN_PAGES'] = int(os.environ.get('PDF_PARALLEL_MIN_PAGES', 8))
+
+text_cache = TextCache(
+    max_memory_bytes=app.config['TEXT_CACHE_MAX_BYTES'],
+    disk_path=app.config['TEXT_CACHE_PATH'],
+    max_disk_bytes=app.config['TEXT_CACHE_DISK_MAX_BYTES'],
+)
+
 # --- NLP Model Initialization (Lazy Loading) ---
+# Loaded on first use, or eagerly by warm_up_nlp() when PRELOAD_MODEL=1.
 nlp = None
-matcher = None
+_nlp_lock = threading.Lock()
+model_state = {'ready': False, 'load_seconds': None, 'warmup_seconds': None, 'preloaded': False}
 
 def get_nlp():
-    global nlp, matcher
+    """Returns the spaCy pipeline and the current taxonomy's skill Matcher."""
+    global nlp
     if nlp is None:
-        nlp = spacy.load("en_core_web_sm")
-        matcher = Matcher(nlp.vocab)
-        # Re-add patterns to the new matcher instance
-        add_skill_patterns(matcher) 
-    return nlp, matcher
-
-# --- Global Skill Lists and Mappings ---
-COMMON_SKILLS = {
-    "python", "java", "javascript", "react", "angular", "vue.js", "sql", "nosql", "aws", "azure", "google cloud",
-    "docker", "kubernetes", "communication", "problem-solving", "teamwork", "leadership", "project management",
-    "agile", "scrum", "waterfall", "testing", "debugging", "data analysis", "machine learning", "deep learning",
-    "natural language processing", "frontend development", "backend development", "full-stack development",
-    "network administration", "cybersecurity", "technical writing", "customer service",
-    "html", "css", "php", "mongodb", "c++", "c", "dsa", "power bi", "laravel", "restful api", "cpanel", "github",
-    "react native", "typescript", "expo", "tailwindcss", "nativewind", "react-native-video", "react-navigation",
-    "react-query", "axios", "file upload", "media handling", "amazon web services", "google cloud platform",
-    "software development", "web applications", "mobile applications", "apis", "api", "databases", "database management",
-    "version control", "git", "ci/cd", "devops", "troubleshoot", "optimize", "ui/ux",
-    "computer science", "engineering", "algorithms", "data structures", "spring boot", "node.js", "django",
-    "firebase", "graphql", "rest apis", "mysql", "postgresql", "sqlite", "bootstrap", "opencv", "mediapipe",
-    "tensorflow", "scikit-learn", "pandas", "numpy", "matplotlib", "requests", "pillow", "beautifulsoup", "seaborn",
-    "keras", "pytorch", "linux", "unix", "windows", "macos", "cloud", "security", "networking", "shell scripting",
-    "data modeling", "etl", "data warehousing", "big data", "spark", "hadoop", "kafka", "tableau", "powerbi",
-    "excel", "jira", "confluence", "trello", "scrum master", "product management", "stakeholder management",
-    "client communication", "presentation skills", "analytical skills", "critical thinking", "adaptability",
-    "innovation", "eager to learn", "problem solver", "team player", "collaborative mindset", "proactive",
-    "responsive web design", "ui/ux principles", "mobile development", "fullstack", "full stack",
-    "coding standards", "application performance", "industry trends", "coding", "clean code", "maintainable code",
-    "cross-platform development", "mobile device compatibility", "backend integrations",
-    "real-world applications", "software solutions", "front-end development", "back-end development", "integrations",
-    "hosting", "deployment fundamentals", "deployment", "experience", "knowledge", "familiarity", "understanding",
-    "restful api basics", "mysql database management", "hosting & deployment fundamentals", "core php programming",
-    "mobile experience", "seamless mobile experience", "visually appealing ui", "clean code", "modular code",
-    "maintainable code", "responsive mobile applications", "high-quality apps", "smooth apps", "debug",
-    "optimize performance", "integrate rest apis", "graphql endpoints", "modern react native libraries",
-    "video players", "image pickers", "gesture handlers", "follow best practices", "mobile development best practices",
-    "version control", "app deployment", "cross-platform development", "mobile device compatibility",
-    "firebase", "local storage", "backend integrations", "troubleshoot issues", "performance bottlenecks",
-    "animation glitches",
-    "rest api", # ADDED: The normalized form of "restful api" explicitly here
-    "mysql" # ADDED: Ensure mysql is also in common skills explicitly if needed for filtering
-}
-
-SKILL_MAPPING = {
-    "python programming": "python", "python skills": "python",
-    "java development": "java",
-    "js": "javascript", "javascipt": "javascript",
-    "html5": "html", "html": "html",
-    "css3": "css", "css": "css",
-    "react.js": "react", "reactnative": "react native",
-    "type script": "typescript", "ts": "typescript",
-    "expo": "expo",
-    "tailwind css": "tailwindcss",
-    "nativewind": "nativewind",
-    "amazon web services": "aws", "amazon web services (aws)": "aws",
-    "google cloud platform": "google cloud", "googlecloud": "google cloud",
-    "restful api": "rest api", "rest apis": "rest api", "api": "rest api", "apis": "rest api", "restful api basics": "rest api",
-    "version control systems": "git", "github": "git", # Map github to git for broader matching
-    "data structures and algorithms": "dsa", "data structures": "dsa", "algorithms": "dsa",
-    "mysql database management": "sql", "database management": "sql", "databases": "sql", "mysql": "sql", # Map mysql to sql
-    "ci/cd pipelines": "ci/cd", "ci cd": "ci/cd",
-    "devops practices": "devops",
-    "ui/ux principles": "ui/ux", "ui/ux": "ui/ux", "visually appealing ui": "ui/ux",
-    "mobile app development": "mobile applications", "mobile application": "mobile applications", "mobile apps": "mobile applications", "responsive mobile applications": "mobile applications",
-    "web app development": "web applications", "web application": "web applications",
-    "communication skills": "communication", "good communication skills": "communication",
-    "collaborative mindset": "collaboration", "teamwork abilities": "teamwork", "team player": "teamwork",
-    "troubleshoot": "troubleshoot", "debug": "debug", "optimize": "optimize", "troubleshoot issues": "troubleshoot", "performance bottlenecks": "troubleshoot", "animation glitches": "troubleshoot",
-    "software development": "software development",
-    "full stack": "full-stack", "fullstack": "full-stack",
-    "responsive web design": "responsive web design",
-    "front-end development": "front-end development", "back-end development": "back-end development",
-    "hosting": "hosting", "deployment fundamentals": "deployment", "deployment": "deployment", "hosting & deployment fundamentals": "deployment", "app deployment": "deployment",
-    "integrations": "integrations", "backend integrations": "integrations",
-    "core php programming": "php",
-    "clean code": "clean code", "modular code": "clean code", "maintainable code": "clean code",
-    "real-world applications": "real-world applications",
-    "modern tools": "modern tools", "cutting-edge apps": "modern tools",
-    "video players": "react native libraries", "image pickers": "react native libraries", "gesture handlers": "react native libraries",
-    "react-native-video": "react native libraries", "react-navigation": "react native libraries", "react-query": "react native libraries", "axios": "react native libraries",
-    "file upload": "file upload", "media handling": "media handling", "file upload and media handling libraries": "media handling",
-    "cross-platform development": "cross-platform development", "mobile device compatibility": "mobile device compatibility",
-    "firebase": "firebase", "local storage": "local storage"
-}
-
-HARD_SKILLS = {
-    "python", "java", "javascript", "react", "angular", "vue.js", "sql", "nosql", "aws", "azure", "google cloud",
-    "docker", "kubernetes", "html", "css", "php", "mongodb", "c++", "c", "dsa", "power bi", "laravel", "rest api", "cpanel", "git",
-    "react native", "typescript", "expo", "tailwindcss", "nativewind", "react native libraries",
-    "spring boot", "node.js", "django", "firebase", "graphql", "mysql", "postgresql", "sqlite", "bootstrap",
-    "opencv", "mediapipe", "tensorflow", "scikit-learn", "pandas", "numpy", "matplotlib", "requests", "pillow",
-    "beautifulsoup", "seaborn", "keras", "pytorch", "linux", "unix", "windows", "macos", "shell scripting",
-    "jira", "confluence", "trello", "axios"
-    # Removed broader terms like "deployment", "hosting", "integrations", "responsive web design", "software development" from HARD_SKILLS
-}
+        with _nlp_lock:
+            if nlp is None:
+                started = time.perf_counter()
+                nlp = spacy.load("en_core_web_sm")
+                model_state['load_seconds'] = round(time.perf_counter() - started, 3)
+                STAGE_SECONDS.observe(time.perf_counter() - started, 'model_load')
+                model_state['ready'] = True
+    return nlp, current_taxonomy().matcher(nlp.vocab)
+
+def warm_up_nlp():
+    """Loads the model and runs a dummy doc through NER and the matcher.
+
+    Meant to run in the gunicorn master before workers fork (see
+    gunicorn.conf.py), so every worker shares the model's pages copy-on-write.
+    gc.freeze() moves everything allocated so far out of the collector's
+    reach; otherwise the first collection in each worker would write to
+    those objects and un-share the pages.
+    """
+    started = time.perf_counter()
+    nlp, matcher = get_nlp()
+    matcher(nlp("warm up: python, react native, sql and docker on aws"))
+    model_state['warmup_seconds'] = round(time.perf_counter() - started, 3)
+    gc.collect()
+    gc.freeze()
 
+_model_loader = None
+_model_loader_lock = threading.Lock()
 
-SKILL_GROUPS = {
-    "database management": {"sql", "mysql", "mongodb", "postgresql", "firebase", "local storage"},
-    "frontend development": {"html", "css", "javascript", "react", "react.js", "react native", "frontend development", "typescript", "tailwindcss", "nativewind", "bootstrap", "ui/ux", "responsive web design"},
-    "backend development": {"python", "php", "flask", "backend development", "rest api", "django", "node.js", "spring boot", "laravel", "integrations", "graphql", "backend integrations"},
-    "mobile development": {"react native", "expo", "react-native-video", "react-navigation", "tailwindcss", "nativewind", "file upload", "media handling", "firebase", "mobile applications", "responsive mobile applications", "cross-platform development", "mobile device compatibility"},
-    "cloud technologies": {"aws", "azure", "google cloud", "amazon web services", "google cloud platform"},
-    "methodologies": {"agile", "scrum", "waterfall"},
-    "libraries": {"react-query", "axios", "file upload", "media handling", "pandas", "numpy", "matplotlib", "requests", "pillow", "tensorflow", "opencv", "scikit-learn", "beautifulsoup", "seaborn", "keras", "pytorch", "react native libraries"},
-    "version control": {"git", "github"},
-    "core programming": {"python", "java", "javascript", "c", "c++", "dsa", "algorithms", "data structures", "typescript", "clean code", "modular code", "maintainable code"},
-    "devops": {"ci/cd", "devops", "kubernetes", "docker", "hosting", "deployment", "deployment fundamentals", "app deployment"},
-    "project management": {"project management", "jira", "confluence", "trello", "scrum master"},
-    "troubleshooting": {"troubleshoot", "debug", "optimize", "optimize performance", "troubleshoot issues", "performance bottlenecks", "animation glitches"}
-}
+def load_model_in_background():
+    """Starts loading the model on a daemon thread, unless it is loaded or already loading.
 
-# --- CRITICAL CHANGE FOR REST API ---
-# Removed 'rest' from WHOLE_WORD_SKILLS to allow patterns like 'restful api' to match correctly.
-# Added 'rest api' explicitly to WHOLE_WORD_SKILLS for robust matching of the normalized form.
-WHOLE_WORD_SKILLS = {"c", "r", "java", "aws", "git", "sql", "php", "css", "html", "api", "apis", "ui/ux", "expo", "mysql", "html5", "css3", "react", "django", "node.js", "spring", "boot", "laravel", "cpanel", "github", "rest api"}
+    Lets a readiness probe warm a lazily loaded model (no PRELOAD_MODEL)
+    without waiting for the first analysis request.
+    """
+    global _model_loader
+    with _model_loader_lock:
+        if model_state['ready'] or (_model_loader is not None and _model_loader.is_alive()):
+            return
+        _model_loader = threading.Thread(target=_load_model, name='model-loader', daemon=True)
+        _model_loader.start()
+
+def _load_model():
+    try:
+        get_nlp()
+    except Exception:
+        # The next readiness probe starts another attempt
+        logger.exception("Loading the spaCy model failed")
+
+def model_status():
+    """'ok' once loaded, 'loading' while a load runs, else 'lazy' (loads on first use)."""
+    if model_state['ready']:
+        return 'ok'
+    if _model_loader is not None and _model_loader.is_alive():
+        return 'loading'
+    return 'lazy'
+
+# --- Skill Taxonomy ---
+# Skill lists, mappings and Matcher patterns live in taxonomy.json; run
+# `python taxonomy.py` to compile them into TAXONOMY_ARTIFACT. Workers swap
+# in a rebuilt artifact within TAXONOMY_CHECK_INTERVAL seconds, and each
+# request pins one taxonomy for its whole lifetime (see pin_taxonomy()).
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+app.config['TAXONOMY_SOURCE'] = os.environ.get('TAXONOMY_SOURCE') or os.path.join(BACKEND_DIR, 'taxonomy.json')
+app.config['TAXONOMY_ARTIFACT'] = os.environ.get('TAXONOMY_ARTIFACT') or os.path.join(BACKEND_DIR, 'taxonomy.pkl')
+app.config['TAXONOMY_CHECK_INTERVAL'] = float(os.environ.get('TAXONOMY_CHECK_INTERVAL', 5))
+
+taxonomy_loader = TaxonomyLoader(app.config['TAXONOMY_ARTIFACT'], app.config['TAXONOMY_SOURCE'],
+                                 check_interval=app.config['TAXONOMY_CHECK_INTERVAL'])
+
+def current_taxonomy():
+    """The taxonomy pinned to the current request, else the live one."""
+    if has_app_context():
+        pinned = g.get('taxonomy')
+        if pinned is not None:
+            return pinned
+    return taxonomy_loader.current
 
 # --- Helper Functions (No changes from previous turn) ---
 def allowed_file(filename):
     """Checks if the uploaded file has an allowed extension."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
-def extract_text(filepath):
-    """Extracts text from PDF or DOCX files."""
-    file_extension = filepath.rsplit('.', 1)[1].lower()
+def _as_stream(source):
+    """Wraps raw bytes in a BytesIO; paths and file objects are returned unchanged."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return source
+
+def extract_text(source, filename=None):
+    """Extracts text from a PDF or DOCX given a path, a binary stream or raw bytes.
+
+    ``filename`` is only needed to pick the parser when ``source`` is not a path.
+    """
+    return extract_document(source, filename)[0]
+
+def extract_document(source, filename=None):
+    """Like extract_text(), but returns ``(text, truncated)``; see extract_pdf()."""
+    filename = filename or source
+    file_extension = filename.rsplit('.', 1)[1].lower()
     if file_extension == 'pdf':
-        return extract_text_from_pdf(filepath)
+        return extract_pdf(source)
     elif file_extension == 'docx':
-        return extract_text_from_docx(filepath)
-    return ""
+        return extract_text_from_docx(source), False
+    return "", False
 
-def extract_text_from_pdf(pdf_path):
-    """Extracts text from a PDF file."""
-    text = ""
+def _text_cache_key(stream, file_extension):
+    """text_cache key of an upload stream; also records the upload's size."""
+    key = f"{EXTRACTOR_VERSION}:{file_extension}:{file_digest(stream)}"
+    if file_extension == 'pdf':
+        # The page cap changes the extracted text, so it is part of the key
+        key += f":{app.config['PDF_MAX_PAGES']}"
+    UPLOAD_BYTES.observe(stream.seek(0, io.SEEK_END), file_extension)
+    stream.seek(0)
+    return key
+
+def extract_text_cached(stream, filename):
+    """Like extract_document() for an upload stream, but served from text_cache when possible."""
+    file_extension = filename.rsplit('.', 1)[1].lower()
+    key = _text_cache_key(stream, file_extension)
+    entry = text_cache.get(key)
+    if entry is None:
+        with STAGE_SECONDS.time('extract_text'):
+            entry = extract_document(stream, filename)
+        # Parse failures come back as an error string; don't pin those in the cache.
+        if not entry[0].startswith("Error reading "):
+            text_cache.set(key, *entry)
+    TEXT_CHARS.observe(len(entry[0]), file_extension)
+    return entry
+
+def extract_text_and_skills(stream, filename, engine=None):
+    """extract_text_cached() for callers that extract skills in the same process.
+
+    Returns ``(text, truncated, skills)``. On a PDF text_cache miss with
+    the spaCy engine and no page-parallel parsing (PDF_WORKERS <= 1), the
+    pages go through extract_skills_from_pages() as they are parsed and
+    ``skills`` holds its result; otherwise ``skills`` is None.
+    """
+    engine = engine or app.config['SKILL_ENGINE']
+    file_extension = filename.rsplit('.', 1)[1].lower()
+    if engine != 'spacy' or file_extension != 'pdf' or app.config['PDF_WORKERS'] > 1:
+        return (*extract_text_cached(stream, filename), None)
+    key = _text_cache_key(stream, file_extension)
+    entry = text_cache.get(key)
+    if entry is not None:
+        TEXT_CHARS.observe(len(entry[0]), file_extension)
+        return (*entry, None)
+    errors = []
+
+    def guarded(pages):
+        # Parse errors end the document like extract_pdf() does; spaCy's own still raise
+        try:
+            yield from pages
+        except Exception as e:
+            errors.append(e)
+
+    with STAGE_SECONDS.time('extract_text_and_spacy'):
+        try:
+            pages, truncated = open_pdf_pages(stream)
+        except Exception as e:
+            errors.append(e)
+        else:
+            text, skills = extract_skills_from_pages(guarded(pages))
+    if errors:
+        return f"Error reading PDF: {errors[0]}", False, None
+    text_cache.set(key, text, truncated)
+    TEXT_CHARS.observe(len(text), file_extension)
+    return text, truncated, skills
+
+def _page_texts(pdf_reader, start, stop):
+    for page_num in range(start, stop):
+        yield pdf_reader.pages[page_num].extract_text()
+
+def _page_limit(pdf_reader, max_pages):
+    page_count = len(pdf_reader.pages)
+    return min(page_count, max_pages) if max_pages else page_count
+
+def _pdf_page_range_text(data, start, stop):
+    """pdf_pool task: extracts pages [start, stop) from the raw PDF bytes."""
+    return list(_page_texts(PyPDF2.PdfReader(io.BytesIO(data)), start, stop))
+
+def _extract_pdf_pages_parallel(source, page_count):
+    """Splits the pages into contiguous ranges across pdf_pool; returns None when the pool is full."""
+    if isinstance(source, str):
+        with open(source, 'rb') as file:
+            data = file.read()
+    else:
+        source.seek(0)
+        data = source.read()
+    per_worker = -(-page_count // app.config['PDF_WORKERS'])
+    futures = []
     try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text += page.extract_text()
+        for start in range(0, page_count, per_worker):
+            futures.append(pdf_pool.submit(_pdf_page_range_text, data, start, min(start + per_worker, page_count)))
+    except PoolSaturated:
+        for future in futures:
+            future.cancel()
+        return None
+    return [text for future in futures for text in future.result()]
+
+def _open_pdf(pdf_file, max_pages):
+    """Returns ``(source stream, reader, pages to read, truncated)`` for a PDF."""
+    max_pages = app.config['PDF_MAX_PAGES'] if max_pages is None else max_pages
+    source = _as_stream(pdf_file)
+    pdf_reader = PyPDF2.PdfReader(source)
+    page_count = _page_limit(pdf_reader, max_pages)
+    truncated = page_count < len(pdf_reader.pages)
+    if truncated:
+        log_event('pages_truncated', logging.INFO, pages=len(pdf_reader.pages), limit=max_pages)
+    return source, pdf_reader, page_count, truncated
+
+def open_pdf_pages(pdf_file, max_pages=None):
+    """Opens a PDF path, binary stream or bytes for reading one page at a time.
+
+    Returns ``(pages, truncated)``: a generator that parses each page only
+    when its text is asked for, so downstream stages can start on the first
+    pages before the rest are parsed (see extract_skills_from_pages()), and
+    whether ``max_pages`` (default PDF_MAX_PAGES; 0 means all) left pages
+    out. Unlike extract_pdf(), parse errors are raised to the caller.
+    """
+    _, pdf_reader, page_count, truncated = _open_pdf(pdf_file, max_pages)
+    return _page_texts(pdf_reader, 0, page_count), truncated
+
+def extract_text_from_pdf(pdf_file, max_pages=None):
+    """Extracts text from a PDF path, binary stream or bytes; see extract_pdf()."""
+    return extract_pdf(pdf_file, max_pages)[0]
+
+def extract_pdf(pdf_file, max_pages=None):
+    """Extracts text from a PDF path, binary stream or bytes as ``(text, truncated)``.
+
+    Reads at most ``max_pages`` pages (default PDF_MAX_PAGES; 0 means all);
+    ``truncated`` tells whether that left pages out. Long documents are
+    split across pdf_pool when PDF_WORKERS > 1, falling back to a serial
+    pass if the pool is busy.
+    """
+    try:
+        source, pdf_reader, page_count, truncated = _open_pdf(pdf_file, max_pages)
+        texts = None
+        if app.config['PDF_WORKERS'] > 1 and page_count >= app.config['PDF_PARALLEL_MIN_PAGES']:
+            texts = _extract_pdf_pages_parallel(source, page_count)
+        # Join once instead of growing a string page by page
+        text = "".join(texts if texts is not None else _page_texts(pdf_reader, 0, page_count))
+        return text, truncated
     except Exception as e:
-        return f"Error reading PDF: {e}"
-    return text
+        return f"Error reading PDF: {e}", False
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_P, _W_T, _W_TAB, _W_BR, _W_CR, _W_TBL = (_W + 'p', _W + 't', _W + 'tab', _W + 'br', _W + 'cr', _W + 'tbl')
+# Text boxes are stored twice (modern markup plus a VML fallback); skip the copy.
+_MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
 
-def extract_text_from_docx(docx_path):
-    """Extracts text from a DOCX file."""
-    text = ""
+def iter_docx_paragraphs(docx_file):
+    """Yields the text of every paragraph, table cells included, in document order.
+
+    word/document.xml is streamed out of the zip with an incremental parser
+    and each paragraph is discarded once yielded, so no document object model
+    is ever built and memory stays flat on large templated resumes.
+    """
+    with zipfile.ZipFile(_as_stream(docx_file)) as archive, archive.open('word/document.xml') as xml_file:
+        paragraphs = []  # text pieces of each open paragraph (text boxes nest them)
+        in_fallback = 0
+        for event, elem in ET.iterparse(xml_file, events=('start', 'end')):
+            tag = elem.tag
+            if event == 'start':
+                if tag == _MC_FALLBACK:
+                    in_fallback += 1
+                elif tag == _W_P and not in_fallback:
+                    paragraphs.append([])
+                continue
+            if tag == _MC_FALLBACK:
+                in_fallback -= 1
+            elif in_fallback or not paragraphs:
+                pass
+            elif tag == _W_T:
+                if elem.text:
+                    paragraphs[-1].append(elem.text)
+            elif tag == _W_TAB:
+                paragraphs[-1].append('\t')
+            elif tag in (_W_BR, _W_CR):
+                paragraphs[-1].append('\n')
+            elif tag == _W_P:
+                yield ''.join(paragraphs.pop())
+            if tag in (_W_P, _W_TBL):
+                elem.clear()
+
+def extract_text_from_docx(docx_file):
+    """Extracts text from a DOCX path, binary stream or bytes, one line per paragraph or table cell."""
     try:
-        doc = docx.Document(docx_path)
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
+        return "".join(paragraph + "\n" for paragraph in iter_docx_paragraphs(docx_file))
     except Exception as e:
         return f"Error reading DOCX: {e}"
-    return text
+
+# --- Text Budgets ---
+# Text past MAX_TEXT_CHARS (0 = no limit) is dropped before analysis, cut at
+# a line boundary, and results carry ``truncated``, as they do when
+# PDF_MAX_PAGES drops pages. spaCy sees at most
+# NLP_CHUNK_CHARS at a time: longer texts go through nlp.pipe() in chunks
+# that repeat the last NLP_CHUNK_OVERLAP characters of the previous chunk,
+# so a skill phrase across a cut is still matched whole. Together with
+# PDF_MAX_PAGES this caps the memory a single upload can take.
+app.config['MAX_TEXT_CHARS'] = int(os.environ.get('MAX_TEXT_CHARS', 300_000))
+app.config['NLP_CHUNK_CHARS'] = int(os.environ.get('NLP_CHUNK_CHARS', 20_000))
+app.config['NLP_CHUNK_OVERLAP'] = int(os.environ.get('NLP_CHUNK_OVERLAP', 200))
+app.config['NLP_CHUNK_BATCH_SIZE'] = int(os.environ.get('NLP_CHUNK_BATCH_SIZE', 2))
+
+def _boundary_before(text, start, end):
+    """Index just past the last paragraph, line or word break in text[start:end], else ``end``."""
+    for separator in ('\n\n', '\n', ' '):
+        i = text.rfind(separator, start, end)
+        if i != -1:
+            return i + len(separator)
+    return end
+
+def clip_text(text, max_chars):
+    """Returns ``(text, truncated)`` with ``text`` cut to at most ``max_chars`` (0 = no limit)."""
+    if not max_chars or len(text) <= max_chars:
+        return text, False
+    return text[:_boundary_before(text, max_chars // 2, max_chars)], True
+
+def split_into_chunks(text, max_chars, overlap=0):
+    """Splits ``text`` into pieces of at most ``max_chars``, cut at paragraph, line or word breaks.
+
+    Every piece after the first starts at the first word break within the
+    last ``overlap`` characters of the previous piece, so any phrase of up
+    to ``overlap`` characters appears whole in at least one piece.
+    """
+    if len(text) <= max_chars:
+        return [text]
+    # Pieces are at least max_chars / 2 long, so a quarter keeps them advancing
+    overlap = min(overlap, max_chars // 4)
+    chunks = []
+    start = 0
+    while len(text) - start > max_chars:
+        cut = _boundary_before(text, start + max_chars // 2, start + max_chars)
+        chunks.append(text[start:cut])
+        start = cut - overlap
+        while start < cut and not text[start - 1].isspace():
+            start += 1
+    chunks.append(text[start:])
+    return chunks
+
+class PageChunks:
+    """split_into_chunks() for text that is still arriving page by page.
+
+    Iterating yields exactly the chunks split_into_chunks() cuts from the
+    lowered text of all ``pages`` after clip_text() to ``max_text_chars``,
+    but yields each one as soon as the pages read so far fix it. Once the
+    pages run out, ``text`` holds all of them joined (not clipped).
+    """
+
+    def __init__(self, pages, max_chars, overlap=0, max_text_chars=0):
+        self.pages = pages
+        self.max_chars = max_chars
+        self.overlap = overlap
+        self.max_text_chars = max_text_chars
+        self.text = None
+
+    def __iter__(self):
+        max_chars = self.max_chars
+        overlap = min(self.overlap, max_chars // 4)
+        parts = []
+        read = 0
+        consumed = 0  # lowered characters before the start of the next chunk
+        pending = ''  # lowered text from there on
+        for page in self.pages:
+            parts.append(page)
+            read += len(page)
+            pending += page.lower()
+            # clip_text() keeps at least half the budget, and lower() never
+            # shortens text, so the first ``settled`` characters are final.
+            settled = min(read, self.max_text_chars // 2) if self.max_text_chars else read
+            # The loop of split_into_chunks(), run while its window is settled
+            while settled - consumed > max_chars:
+                cut = _boundary_before(pending, max_chars // 2, max_chars)
+                yield pending[:cut]
+                start = cut - overlap
+                while start < cut and not pending[start - 1].isspace():
+                    start += 1
+                pending = pending[start:]
+                consumed += start
+        self.text = ''.join(parts)
+        clipped, _ = clip_text(self.text, self.max_text_chars)
+        yield from split_into_chunks(clipped.lower()[consumed:], max_chars, overlap)
+
+# --- Preprocessed Resume Document ---
+class ResumeDocument:
+    """Resume text preprocessed once per upload and shared by every analyzer.
+
+    Derived forms are computed on first use and then reused, so the skill,
+    section, action-verb and summary passes never re-lower or re-split the text.
+    Pass ``truncated`` for text the extractor already cut short (see extract_pdf()).
+    """
+
+    def __init__(self, text, truncated=False):
+        self.text, clipped = clip_text(text, app.config['MAX_TEXT_CHARS'])
+        self.truncated = clipped or truncated
+        if clipped:
+            log_event('text_truncated', logging.INFO, chars=len(text), limit=app.config['MAX_TEXT_CHARS'])
+
+    @cached_property
+    def lowered(self):
+        return self.text.lower()
+
+    @cached_property
+    def lines(self):
+        """Stripped lines, in order (blank lines kept as '')."""
+        return [line.strip() for line in self.text.split('\n')]
+
+    @cached_property
+    def lowered_lines(self):
+        """Lowercased counterpart of ``lines``."""
+        return [line.strip() for line in self.lowered.split('\n')]
+
+    @cached_property
+    def collapsed(self):
+        """Text with every whitespace run collapsed to a single space."""
+        return re.sub(r'\s+', ' ', self.text)
+
+    @cached_property
+    def segments(self):
+        """Per-section line indexes and section mentions; see segment_resume()."""
+        return segment_resume(self)
+
+    @cached_property
+    def signature(self):
+        """MinHash signature for near-duplicate lookups, or None for very short texts."""
+        with STAGE_SECONDS.time('minhash'):
+            return minhasher.signature(self.text)
+
+def as_document(text):
+    """Returns ``text`` as a ResumeDocument, wrapping plain strings."""
+    return text if isinstance(text, ResumeDocument) else ResumeDocument(text)
+
+def _lowered(text):
+    """Lowercases a string, reusing the cached form of a ResumeDocument."""
+    return text.lowered if isinstance(text, ResumeDocument) else text.lower()
 
 def normalize_skill(skill):
     """Normalizes skill names to a consistent format."""
-    skill = skill.lower().strip()
-    if skill in SKILL_MAPPING:
-        return SKILL_MAPPING[skill]
-    if skill == "react.js":
-        return "react"
-    if skill == "react native":
-        return "react native"
-    return skill
-
-
-def add_skill_patterns(matcher):
-    patterns = [
-        # Programming Languages (Core)
-        [{'LOWER': 'javascript'}], [{'LOWER': 'python'}], [{'LOWER': 'java'}],
-        [{'LOWER': 'html'}], [{'LOWER': 'css'}], [{'LOWER': 'php'}],
-        [{'LOWER': 'c++'}], [{'LOWER': 'c'}], [{'LOWER': 'typescript'}],
-
-        # Frameworks & Libraries (Web/Mobile)
-        [{'LOWER': 'react'}], [{'LOWER': 'django'}], [{'LOWER': 'node.js'}],
-        [{'LOWER': 'spring'}, {'LOWER': 'boot'}], [{'LOWER': 'laravel'}],
-        [{'LOWER': 'vue.js'}], [{'LOWER': 'angular'}],
-        [{'LOWER': 'flask'}], [{'LOWER': 'bootstrap'}],
-
-        # Mobile Specific
-        [{'LOWER': 'react'}, {'LOWER': 'native'}], [{'LOWER': 'expo'}],
-        [{'LOWER': 'tailwindcss'}], [{'LOWER': 'nativewind'}],
-        [{'LOWER': 'react'}, {'LOWER': '-'}, {'LOWER': 'native'}, {'LOWER': '-'}, {'LOWER': 'video'}],
-        [{'LOWER': 'react'}, {'LOWER': '-'}, {'LOWER': 'navigation'}],
-        [{'LOWER': 'react'}, {'LOWER': '-'}, {'LOWER': 'query'}], [{'LOWER': 'axios'}],
-
-        # Databases
-        [{'LOWER': 'sql'}], [{'LOWER': 'mysql'}], [{'LOWER': 'mongodb'}],
-        [{'LOWER': 'postgresql'}], [{'LOWER': 'databases'}], [{'LOWER': 'database'}, {'LOWER': 'management'}],
-
-        # Cloud Platforms
-        [{'LOWER': 'aws'}], [{'LOWER': 'azure'}], [{'LOWER': 'google'}, {'LOWER': 'cloud'}],
-        [{'LOWER': 'amazon'}, {'LOWER': 'web'}, {'LOWER': 'services'}],
-        [{'LOWER': 'google'}, {'LOWER': 'cloud'}, {'LOWER': 'platform'}], [{'LOWER': 'cloud'}, {'LOWER': 'platforms'}],
-
-        # Tools & Concepts
-        [{'LOWER': 'git'}], [{'LOWER': 'version'}, {'LOWER': 'control'}],
-        [{'LOWER': 'data'}, {'LOWER': 'structures'}], [{'LOWER': 'algorithms'}],
-        [{'LOWER': 'dsa'}], # Direct match for DSA
-        [{'LOWER': 'api'}], [{'LOWER': 'apis'}], [{'LOWER': 'rest'}, {'LOWER': 'api'}],
-        [{'LOWER': 'ci/cd'}], [{'LOWER': 'devops'}], [{'LOWER': 'agile'}], [{'LOWER': 'scrum'}],
-        [{'LOWER': 'ui/ux'}], [{'LOWER': 'web'}, {'LOWER': 'applications'}],
-        [{'LOWER': 'mobile'}, {'LOWER': 'applications'}],
-        [{'LOWER': 'troubleshoot'}], [{'LOWER': 'debug'}], [{'LOWER': 'optimize'}],
-        [{'LOWER': 'file'}, {'LOWER': 'upload'}], [{'LOWER': 'media'}, {'LOWER': 'handling'}],
-        [{'LOWER': 'linux'}], [{'LOWER': 'unix'}], [{'LOWER': 'windows'}], [{'LOWER': 'macos'}],
-        [{'LOWER': 'shell'}, {'LOWER': 'scripting'}],
-        [{'LOWER': 'coding'}, {'LOWER': 'standards'}], [{'LOWER': 'application'}, {'LOWER': 'performance'}],
-        [{'LOWER': 'industry'}, {'LOWER': 'trends'}], [{'LOWER': 'clean'}, {'LOWER': 'code'}],
-        [{'LOWER': 'maintainable'}, {'LOWER': 'code'}], [{'LOWER': 'software'}, {'LOWER': 'development'}],
-        [{'LOWER': 'responsive'}, {'LOWER': 'web'}, {'LOWER': 'design'}],
-        [{'LOWER': 'front-end'}, {'LOWER': 'development'}],
-        [{'LOWER': 'back-end'}, {'LOWER': 'development'}],
-        [{'LOWER': 'hosting'}], [{'LOWER': 'deployment'}], [{'LOWER': 'deployment'}, {'LOWER': 'fundamentals'}],
-        [{'LOWER': 'integrations'}], # Specific from Web Dev JD
-        [{'LOWER': 'html5'}], [{'LOWER': 'css3'}], # Direct match for HTML5, CSS3
-        [{'LOWER': 'core'}, {'LOWER': 'php'}, {'LOWER': 'programming'}],
-        [{'LOWER': 'mysql'}, {'LOWER': 'database'}, {'LOWER': 'management'}],
-        [{'LOWER': 'restful'}, {'LOWER': 'api'}, {'LOWER': 'basics'}], # Precise pattern
-        [{'LOWER': 'cpanel'}],
-        [{'LOWER': 'github'}] # Specific for GitHub in JD
-    ]
-    matcher.add("SKILL_PATTERN", patterns, on_match=None)
+    return current_taxonomy().normalize(skill)
+
+# --- Skill Engines ---
+# "spacy" runs NER + Matcher, "fast" only the automaton, and "parity" runs
+# both, scoring with spaCy while reporting where the two disagree.
+SKILL_ENGINES = ('spacy', 'fast', 'parity')
+app.config['SKILL_ENGINE'] = os.environ.get('SKILL_ENGINE', 'spacy')
 
 def extract_skills_with_ner_and_patterns(text):
     """Extracts skills from text using spaCy's NER and custom patterns."""
     nlp, matcher = get_nlp()
-    doc = nlp(text.lower())
+    lowered = _lowered(text)
+    chunk_chars = _chunk_chars(nlp)
+    with STAGE_SECONDS.time('spacy'):
+        if len(lowered) <= chunk_chars:
+            return _skills_from_doc(nlp(lowered), matcher)
+        skills = set()
+        chunks = split_into_chunks(lowered, chunk_chars, app.config['NLP_CHUNK_OVERLAP'])
+        for doc in nlp.pipe(chunks, batch_size=app.config['NLP_CHUNK_BATCH_SIZE']):
+            skills |= _skills_from_doc(doc, matcher)
+        return skills
+
+def extract_skills_from_pages(pages):
+    """extract_skills_with_ner_and_patterns() for a document that is still being parsed.
+
+    Returns ``(text, skills)`` with ``text`` the pages joined. Chunks enter
+    nlp.pipe() as soon as PageChunks settles them, so spaCy works on the
+    first pages while later ones are unparsed; the skills are the same as
+    for the joined text.
+    """
+    nlp, matcher = get_nlp()
+    chunks = PageChunks(pages, _chunk_chars(nlp), app.config['NLP_CHUNK_OVERLAP'], app.config['MAX_TEXT_CHARS'])
+    skills = set()
+    for doc in nlp.pipe(chunks, batch_size=app.config['NLP_CHUNK_BATCH_SIZE']):
+        skills |= _skills_from_doc(doc, matcher)
+    return chunks.text, skills
+
+def _chunk_chars(nlp):
+    """Longest text handed to spaCy in one Doc; never above its max_length."""
+    return min(app.config['NLP_CHUNK_CHARS'] or nlp.max_length, nlp.max_length)
+
+def extract_skills_fast(text):
+    """Extracts normalized skills in one pass over the text, without loading spaCy."""
+    return current_taxonomy().skill_automaton.findall(_lowered(text))
+
+def compare_skill_engines(text):
+    """Runs both engines; returns the spaCy skills and a report of the differences."""
+    spacy_skills = extract_skills_with_ner_and_patterns(text)
+    fast_skills = extract_skills_fast(text)
+    report = {
+        'spacy_only': sorted(spacy_skills - fast_skills),
+        'fast_only': sorted(fast_skills - spacy_skills),
+    }
+    return spacy_skills, report
+
+def extract_skills(text, engine=None):
+    """Extracts normalized skills with the chosen engine (defaults to SKILL_ENGINE)."""
+    engine = engine or app.config['SKILL_ENGINE']
+    if engine == 'fast':
+        return extract_skills_fast(text)
+    if engine == 'parity':
+        return compare_skill_engines(text)[0]
+    return extract_skills_with_ner_and_patterns(text)
+
+def extract_skills_batch(texts, batch_size=None, n_process=None, as_tuples=False):
+    """Batched extract_skills_with_ner_and_patterns(): yields one skill set per text, in order.
+
+    Texts are streamed through ``nlp.pipe()`` so the pipeline amortizes its
+    per-call overhead; ``n_process`` > 1 fans the pipe out to worker processes.
+    With ``as_tuples`` the input is ``(text, context)`` pairs and the output
+    ``(skills, context)`` pairs, mirroring ``nlp.pipe(as_tuples=True)``.
+    Texts longer than NLP_CHUNK_CHARS enter the pipe as several chunks whose
+    skills are merged before the text's result is yielded.
+    """
+    nlp, matcher = get_nlp()
+    batch_size = batch_size or app.config['NLP_BATCH_SIZE']
+    n_process = n_process or app.config['NLP_N_PROCESS']
+    chunk_chars = _chunk_chars(nlp)
+    overlap = app.config['NLP_CHUNK_OVERLAP']
+    if not as_tuples:
+        texts = ((text, None) for text in texts)
+
+    def chunked():
+        for text, context in texts:
+            chunks = split_into_chunks(_lowered(text), chunk_chars, overlap)
+            for n, chunk in enumerate(chunks, start=1):
+                yield chunk, (context, n == len(chunks))
+
+    skills = set()
+    docs = nlp.pipe(chunked(), as_tuples=True, batch_size=batch_size, n_process=n_process)
+    for doc, (context, last) in docs:
+        skills |= _skills_from_doc(doc, matcher)
+        if last:
+            yield (skills, context) if as_tuples else skills
+            skills = set()
+
+def _skills_from_doc(doc, matcher):
+    """Collects normalized skills from the entities and matcher hits of a lowered doc."""
+    taxonomy = current_taxonomy()
+    common_skills = taxonomy.common_skills
+    whole_word_skills = taxonomy.whole_word_skills
     skills = set()
 
     # --- Step 1: NER based extraction ---
     potential_skill_labels = ["SKILL", "TECHNOLOGY", "PRODUCT", "ORG", "PERSON", "GPE", "NORP", "FAC", "LOC", "MISC"]
     for ent in doc.ents:
         is_noise_entity = (
-            (len(ent.text.split()) == 1 and len(ent.text) <= 2 and ent.text.lower() not in WHOLE_WORD_SKILLS and ent.text.lower() not in COMMON_SKILLS) or
-            (ent.label_ in ["PERSON", "ORG", "GPE", "DATE", "CARDINAL", "ORDINAL"] and ent.text.lower() not in COMMON_SKILLS)
+            (len(ent.text.split()) == 1 and len(ent.text) <= 2 and ent.text.lower() not in whole_word_skills and ent.text.lower() not in common_skills) or
+            (ent.label_ in ["PERSON", "ORG", "GPE", "DATE", "CARDINAL", "ORDINAL"] and ent.text.lower() not in common_skills)
         )
-        if not is_noise_entity and (ent.label_ in potential_skill_labels or ent.text.lower() in COMMON_SKILLS):
+        if not is_noise_entity and (ent.label_ in potential_skill_labels or ent.text.lower() in common_skills):
             skills.add(ent.text.lower())
 
 
 
     # --- Step 2: Pattern matching for skills ---
-    # Patterns are now added via add_skill_patterns during get_nlp()
+    # Patterns come from the taxonomy; get_nlp() hands out its Matcher
     # if "SKILL_PATTERN" in matcher:
     #     matcher.remove("SKILL_PATTERN")
 
@@ -295,119 +712,217 @@ def extract_skills_with_ner_and_patterns(text):
     # Filter out single-character skills unless they are specifically in WHOLE_WORD_SKILLS
     final_skills = set()
     for skill_text in skills:
-        if len(skill_text) <= 1 and skill_text.lower() not in WHOLE_WORD_SKILLS:
+        if len(skill_text) <= 1 and skill_text.lower() not in whole_word_skills:
             continue
         final_skills.add(skill_text)
 
-    normalized_skills = {normalize_skill(s) for s in final_skills}
+    normalized_skills = {taxonomy.normalize(s) for s in final_skills}
     return normalized_skills
 
+app.config['NLP_BATCH_SIZE'] = int(os.environ.get('NLP_BATCH_SIZE', 16))
+app.config['NLP_N_PROCESS'] = int(os.environ.get('NLP_N_PROCESS', 1))
+# Smaller batches for NDJSON streaming keep time-to-first-result low.
+app.config['NLP_STREAM_BATCH_SIZE'] = int(os.environ.get('NLP_STREAM_BATCH_SIZE', 4))
+
+# --- Job Description Analysis (cached) ---
+# One posting is typically screened against many resumes, so the JD side of
+# analyze_resume() is memoized on the stripped JD text plus taxonomy version.
+app.config['JD_CACHE_SIZE'] = int(os.environ.get('JD_CACHE_SIZE', 256))
+app.config['JD_CACHE_TTL'] = float(os.environ.get('JD_CACHE_TTL', 3600))
+jd_cache = LRUCache(max_entries=app.config['JD_CACHE_SIZE'], ttl=app.config['JD_CACHE_TTL'])
+
+JD_SECTION_RE = re.compile(r'(What You Will Learn & Work On|Key Responsibilities|Qualifications|Preferred Skills|About the Internship|Job Description|Role|Responsibilities|Requirements|Skills|Experience|Qualifications & Skills|Integrations|Front-End Development|Back-End Development)(.*?)(\n\n[A-Z][A-Za-z ]+:|\Z|\n\nJob Description:|\n\nAbout the Company:)', re.DOTALL | re.IGNORECASE)
+
+def analyze_job_description(job_description, engine=None):
+    """Extracts the relevant JD text and its skills, memoized in jd_cache.
+
+    Returns a dict with ``relevant_jd``, ``skills_raw`` and ``required_skills``
+    (frozensets, so callers must copy before mutating), ``required_bits``
+    (the required skills as a taxonomy index bitset), ``mentions_communication``,
+    ``parity`` when the parity engine is used, and ``truncated`` when the
+    text was cut to MAX_TEXT_CHARS.
+    """
+    engine = engine or app.config['SKILL_ENGINE']
+    taxonomy = current_taxonomy()
+    job_description, truncated = clip_text(job_description.strip(), app.config['MAX_TEXT_CHARS'])
+    key = (taxonomy.version, engine, hashlib.sha256(job_description.encode('utf-8')).hexdigest())
+    jd_analysis = jd_cache.get(key)
+    if jd_analysis is not None:
+        return jd_analysis
+
+    # Focus JD skill extraction on relevant sections
+    with STAGE_SECONDS.time('jd_regex'):
+        match = JD_SECTION_RE.search(job_description)
+    if match:
+        relevant_jd = match.group(2).strip()
+    else:
+        relevant_jd = job_description
+
+    parity = None
+    if engine == 'parity':
+        job_description_skills_raw, parity = compare_skill_engines(relevant_jd)
+    else:
+        job_description_skills_raw = extract_skills(relevant_jd, engine)
+    # Filter JD skills strictly by COMMON_SKILLS (as these are what we can match against)
+    required_skills = frozenset(s for s in job_description_skills_raw if s in taxonomy.common_skills)
+    jd_analysis = {
+        'relevant_jd': relevant_jd,
+        'skills_raw': frozenset(job_description_skills_raw),
+        'required_skills': required_skills,
+        'required_bits': taxonomy.index.to_bits(required_skills),
+        'mentions_communication': "communication" in job_description.lower(),
+    }
+    if parity is not None:
+        jd_analysis['parity'] = parity
+    if truncated:
+        jd_analysis['truncated'] = True
+    jd_cache.set(key, jd_analysis)
+    return jd_analysis
+
+# Skills behind the special cases in match_skill_bits()
+SOFTWARE_DEVELOPMENT_EVIDENCE = ("full-stack", "web applications", "mobile applications", "software development")
+
+def _special_bits(taxonomy):
+    """``(communication, software development, its evidence)`` bitsets for a taxonomy."""
+    communication_bit = taxonomy.bits("communication") if "communication" in taxonomy.common_skills else 0
+    return communication_bit, taxonomy.bits("software development"), taxonomy.bits(*SOFTWARE_DEVELOPMENT_EVIDENCE)
+
+def match_skill_bits(resume_bits, jd_analysis):
+    """Compares a COMMON_SKILLS resume bitset with an analyze_job_description() result.
+
+    Returns ``(resume, required, matching, missing, extra)`` bitsets.
+    """
+    communication_bit, software_development_bit, software_development_evidence = _special_bits(current_taxonomy())
+    required_bits = jd_analysis['required_bits']
+    # Handle soft skills separately if needed, or ensure they are well-covered by COMMON_SKILLS
+    if jd_analysis['mentions_communication'] and resume_bits & communication_bit:
+        required_bits |= communication_bit
+
+    matching_bits = resume_bits & required_bits
+    missing_bits = required_bits & ~resume_bits
+    extra_bits = resume_bits & ~required_bits
+
+    # Special handling for "software development" or other broad terms if they are causing issues
+    if required_bits & software_development_bit and resume_bits & software_development_evidence:
+        matching_bits |= software_development_bit
+        missing_bits &= ~software_development_bit
+    return resume_bits, required_bits, matching_bits, missing_bits, extra_bits
+
+def score_skill_match(resume_bits, required_bits, matching_bits):
+    """The overall_score formula: hard-skill coverage, else coverage of all required skills."""
+    # Score calculation: More robust to empty sets
+    if not required_bits:
+        return 10.00 if resume_bits else 0.00
+    hard_mask = current_taxonomy().index.hard_mask
+    required_hard_bits = required_bits & hard_mask
+    if not required_hard_bits:
+        return popcount(matching_bits) / popcount(required_bits) * 100
+    return popcount(matching_bits & hard_mask) / popcount(required_hard_bits) * 100
+
 # --- Main Analysis Function ---
-def analyze_resume(text, job_description=None):
+@STAGE_SECONDS.time('analyze')
+def analyze_resume(text, job_description=None, resume_skills=None, jd_analysis=None, engine=None):
+    """Scores a resume against an optional job description.
+
+    ``resume_skills`` and ``jd_analysis`` let batch callers pass in skills
+    already extracted via extract_skills_batch() / analyze_job_description().
+    ``engine`` picks the skill extraction engine (see SKILL_ENGINES).
+    ``text`` may be a plain string or a ResumeDocument.
+    """
     results = {}
+    text = as_document(text)
+    engine = engine or app.config['SKILL_ENGINE']
 
-    resume_skills = extract_skills_with_ner_and_patterns(text)
+    if resume_skills is None:
+        if engine == 'parity':
+            resume_skills, parity = compare_skill_engines(text)
+            results['engine_parity'] = {'resume': parity}
+        else:
+            resume_skills = extract_skills(text, engine)
     # Filter out noise from resume_skills that are not in COMMON_SKILLS (e.g., names, random words)
-    resume_skills = {s for s in resume_skills if s in COMMON_SKILLS}
+    index = current_taxonomy().index
+    resume_bits = index.to_bits(resume_skills) & index.common_mask
+    to_skills = index.to_skills
 
     if job_description:
-        # Focus JD skill extraction on relevant sections
-        import re
-        relevant_jd = job_description
-        match = re.search(r'(What You Will Learn & Work On|Key Responsibilities|Qualifications|Preferred Skills|About the Internship|Job Description|Role|Responsibilities|Requirements|Skills|Experience|Qualifications & Skills|Integrations|Front-End Development|Back-End Development)(.*?)(\n\n[A-Z][A-Za-z ]+:|\Z|\n\nJob Description:|\n\nAbout the Company:)', job_description, re.DOTALL | re.IGNORECASE)
-        if match:
-            relevant_jd = match.group(2).strip()
-        else:
-            relevant_jd = job_description.strip()
-
-        job_description_skills_raw = extract_skills_with_ner_and_patterns(relevant_jd)
-        
-        # Filter JD skills strictly by COMMON_SKILLS (as these are what we can match against)
-        required_jd_skills = {s for s in job_description_skills_raw if s in COMMON_SKILLS}
-
-        # Handle soft skills separately if needed, or ensure they are well-covered by COMMON_SKILLS
-        if "communication" in job_description.lower() and "communication" in COMMON_SKILLS:
-            if "communication" in resume_skills:
-                required_jd_skills.add("communication")
-                resume_skills.add("communication")
-
-
-        matching_skills = set(resume_skills) & set(required_jd_skills)
-        missing_skills = set(required_jd_skills) - set(resume_skills)
-        extra_skills = set(resume_skills) - set(required_jd_skills)
-
-        # Special handling for "software development" or other broad terms if they are causing issues
-        if "software development" in required_jd_skills:
-            if "full-stack" in resume_skills or "web applications" in resume_skills or "mobile applications" in resume_skills or "software development" in resume_skills:
-                matching_skills.add("software development")
-                missing_skills.discard("software development")
-        
-        # --- Print for debugging ---
-        print(f"\n--- Debugging Analysis ---")
-        print(f"Resume Skills (Normalized & Cleaned): {resume_skills}")
-        print(f"JD Relevant Text Used for Skills: \n{relevant_jd[:500]}...")
-        print(f"Job Description Skills (Extracted & Normalized, before COMMON_SKILLS filter): {job_description_skills_raw}")
-        print(f"Required JD Skills (Filtered by COMMON_SKILLS): {required_jd_skills}")
-        print(f"Calculated Matching Skills: {matching_skills}")
-        print(f"Calculated Missing Skills: {missing_skills}")
-        print(f"Calculated Extra Skills: {extra_skills}")
-        print(f"--- End Debugging ---")
-
-        def clean_skill_list(skill_set, filter_hard_skills=False):
-            if filter_hard_skills:
-                return sorted([s for s in list(skill_set) if s in HARD_SKILLS])
-            return sorted([s for s in list(skill_set) if s in COMMON_SKILLS])
-
-        results['matching_skills'] = clean_skill_list(matching_skills, filter_hard_skills=True)
-        results['missing_skills'] = clean_skill_list(missing_skills, filter_hard_skills=True)
-        results['extra_skills'] = clean_skill_list(extra_skills, filter_hard_skills=True)
-        results['resume_skills'] = clean_skill_list(resume_skills)
-
-        # Score calculation: More robust to empty sets
-        if len(required_jd_skills) == 0:
-            overall_score = 0.00
-            if len(resume_skills) > 0:
-                overall_score = 10.00
-        else:
-            matched_hard_skills = set(matching_skills) & set(HARD_SKILLS)
-            required_hard_jd_skills = set(required_jd_skills) & set(HARD_SKILLS)
-
-            if len(required_hard_jd_skills) == 0:
-                overall_score = (len(matching_skills) / len(required_jd_skills)) * 100
-            else:
-                overall_score = (len(matched_hard_skills) / len(required_hard_jd_skills)) * 100
-
+        if jd_analysis is None:
+            jd_analysis = analyze_job_description(job_description, engine)
+        if 'parity' in jd_analysis:
+            results.setdefault('engine_parity', {})['job_description'] = jd_analysis['parity']
+        if jd_analysis.get('truncated'):
+            results['job_description_truncated'] = True
+
+        resume_bits, required_bits, matching_bits, missing_bits, extra_bits = match_skill_bits(resume_bits, jd_analysis)
+
+        if should_log():
+            log_event(
+                'analysis_debug',
+                resume_skills=to_skills(resume_bits),
+                relevant_jd=jd_analysis['relevant_jd'][:500],
+                jd_skills_raw=jd_analysis['skills_raw'],
+                required_skills=to_skills(required_bits),
+                matching_skills=to_skills(matching_bits),
+                missing_skills=to_skills(missing_bits),
+                extra_skills=to_skills(extra_bits),
+            )
+
+        # Bits are in alphabetical id order, so decoded lists come out sorted
+        hard_mask = index.hard_mask
+        results['matching_skills'] = to_skills(matching_bits & hard_mask)
+        results['missing_skills'] = to_skills(missing_bits & hard_mask)
+        results['extra_skills'] = to_skills(extra_bits & hard_mask)
+        results['resume_skills'] = to_skills(resume_bits)
+
+        overall_score = score_skill_match(resume_bits, required_bits, matching_bits)
         results['overall_score'] = f"{overall_score:.2f}"
 
     else:
-        results['extracted_skills'] = sorted(list(resume_skills))
+        results['extracted_skills'] = to_skills(resume_bits)
 
-    sections = ["experience", "education", "skills", "summary", "objective", "projects", "work experience", "about", "certifications"]
-    found_sections = [section for section in sections if section in text.lower()]
-    results['sections_found'] = sorted(found_sections)
+    results['sections_found'] = sorted(text.segments['mentioned'])
 
     action_verbs = ["managed", "led", "developed", "implemented", "created", "analyzed", "designed", "improved", "increased", "reduced", "build", "maintain", "write", "participate", "troubleshoot", "debug", "optimize", "integrate", "use", "follow", "design"]
-    found_action_verbs = [verb for verb in action_verbs if verb in text.lower()]
+    found_action_verbs = [verb for verb in action_verbs if verb in text.lowered]
     results['action_verbs_found'] = sorted(list(set(found_action_verbs)))
+    if text.truncated:
+        results['truncated'] = True
 
     return results
 
-# --- Resume Summary Extraction Helper ---
-def _is_section_header(line, keywords):
-    """Return True when a stripped line is purely a section heading.
-    A section heading is short (<= 6 words), matches one of the keywords,
-    and contains no sentence-level punctuation (commas, periods mid-line, etc.)
-    that would indicate it's a prose sentence.
-    """
-    stripped = line.strip()
-    lower = stripped.lower()
+# --- Resume Section Segmentation ---
+EXP_HDRS  = ['experience', 'work experience', 'employment', 'work history', 'internship']
+PROJ_HDRS = ['project', 'projects', 'personal projects', 'key projects']
+CERT_HDRS = ['certification', 'certifications', 'certificate', 'certificates',
+             'courses', 'awards', 'achievements']
+ANY_SECTION = EXP_HDRS + PROJ_HDRS + CERT_HDRS + [
+    'education', 'skills', 'technical skills', 'summary', 'objective',
+    'about', 'languages', 'hobbies', 'interests', 'references', 'volunteer'
+]
+# Sections analyze_resume() reports when their name appears anywhere in the text
+RESUME_SECTIONS = ["experience", "education", "skills", "summary", "objective", "projects", "work experience", "about", "certifications"]
+
+def _keyword_regex(keywords, overlapping=False):
+    """Compiles keywords into one alternation; ``overlapping`` reports every match start."""
+    alternation = '|'.join(re.escape(kw) for kw in sorted(set(keywords), key=len, reverse=True))
+    return re.compile(f'(?=({alternation}))' if overlapping else alternation)
+
+SECTION_HEADER_RES = {
+    'projects': _keyword_regex(PROJ_HDRS),
+    'work_experience': _keyword_regex(EXP_HDRS),
+    'certifications': _keyword_regex(CERT_HDRS),
+}
+ANY_SECTION_RE = _keyword_regex(ANY_SECTION)
+SECTION_MENTION_RE = _keyword_regex(RESUME_SECTIONS, overlapping=True)
+# A mention of "work experience" is also a mention of "experience"
+_IMPLIED_SECTIONS = {kw: {other for other in RESUME_SECTIONS if other in kw} for kw in RESUME_SECTIONS}
+
+def _has_heading_shape(stripped):
+    """Keyword-independent half of _is_section_header() for an already stripped line."""
     if not stripped:
         return False
+    words = len(stripped.split())
     # Must be <= 6 words (headings are short)
-    if len(stripped.split()) > 6:
-        return False
-    # Must contain at least one of the keywords
-    if not any(kw in lower for kw in keywords):
+    if words > 6:
         return False
     # Prose sentences usually have commas or mid-sentence periods
     if ',' in stripped:
@@ -419,16 +934,66 @@ def _is_section_header(line, keywords):
     if stripped.isupper() or stripped.istitle():
         return True
     # Otherwise accept it if it's very short (<=3 words)
-    return len(stripped.split()) <= 3
+    return words <= 3
 
+def _is_section_header(line, keywords):
+    """Return True when a stripped line is purely a section heading.
+    A section heading is short (<= 6 words), matches one of the keywords,
+    and contains no sentence-level punctuation (commas, periods mid-line, etc.)
+    that would indicate it's a prose sentence.
+    """
+    stripped = line.strip()
+    lower = stripped.lower()
+    return _has_heading_shape(stripped) and any(kw in lower for kw in keywords)
+
+@STAGE_SECONDS.time('segment')
+def segment_resume(document):
+    """Labels every line of a ResumeDocument with its summary section in one pass.
+
+    Returns ``{'sections': {name: [line indexes]}, 'mentioned': set}``, where
+    ``mentioned`` holds the RESUME_SECTIONS names found anywhere in the text.
 
+    Each section is tracked independently: a heading line matching its
+    keywords opens it, and the next heading matching any ANY_SECTION keyword
+    closes it. Heading lines themselves are never content. A blank line also
+    closes projects, while work experience and certifications span blanks.
+    """
+    lines = document.lines
+    lowered_lines = document.lowered_lines
+    sections = {name: [] for name in SECTION_HEADER_RES}
+    is_open = dict.fromkeys(SECTION_HEADER_RES, False)
+    mentioned = set()
+    for i, (stripped, lower) in enumerate(zip(lines, lowered_lines)):
+        for match in SECTION_MENTION_RE.finditer(lower):
+            mentioned.update(_IMPLIED_SECTIONS[match.group(1)])
+        if not stripped:
+            is_open['projects'] = False
+            continue
+        heading = _has_heading_shape(stripped)
+        closes = heading and ANY_SECTION_RE.search(lower) is not None
+        for name, header_re in SECTION_HEADER_RES.items():
+            if is_open[name]:
+                if closes:
+                    is_open[name] = False
+                else:
+                    sections[name].append(i)
+            elif heading and header_re.search(lower):
+                is_open[name] = True
+    return {'sections': sections, 'mentioned': mentioned}
+
+
+@STAGE_SECONDS.time('summary')
 def extract_resume_summary(text):
+    """Extracts contact details and section contents; ``text`` may be a ResumeDocument."""
     summary = {}
+    document = as_document(text)
 
-    lines = text.split('\n')
+    # Stripped lines (plus their lowercase twins) from the shared document
+    lines = document.lines
+    lowered_lines = document.lowered_lines
 
     # Collapse all whitespace so emails split across PDF lines are joined
-    collapsed = re.sub(r'\s+', ' ', text)
+    collapsed = document.collapsed
 
     # --- Name ---
     # Use the original lines so we don't pick up merged garbage from collapsed text
@@ -438,13 +1003,12 @@ def extract_resume_summary(text):
         'profile', 'references', 'languages', 'interests', 'hobbies'
     }
     name = None
-    for line in lines:
-        stripped = line.strip()
+    for stripped, lower in zip(lines, lowered_lines):
         if (stripped
                 and len(stripped.split()) <= 4
                 and stripped[0].isupper()
                 and not any(ch.isdigit() for ch in stripped)
-                and stripped.lower() not in SKIP_HEADERS):
+                and lower not in SKIP_HEADERS):
             name = stripped
             break
     summary['name'] = name
@@ -470,7 +1034,7 @@ def extract_resume_summary(text):
     # --- Phone ---
     phone_match = re.search(
         r'(\+?\d{1,3}[\s\-]?)?(\(?\d{3}\)?[\s\-]?)?\d{3}[\s\-]?\d{4}',
-        text
+        document.text
     )
     summary['phone'] = phone_match.group(0).strip() if phone_match else None
 
@@ -503,134 +1067,685 @@ def extract_resume_summary(text):
 
     # --- Address ---
     address = None
-    for line in lines:
-        if any(word in line.lower() for word in [
+    for stripped, lower in zip(lines, lowered_lines):
+        if any(word in lower for word in [
             'street', 'st.', 'road', 'rd.', 'ave', 'block',
             'city', 'state', 'zip', 'pincode', 'village', 'district'
-        ]) and any(char.isdigit() for char in line):
-            address = line.strip()
+        ]) and any(char.isdigit() for char in stripped):
+            address = stripped
             break
     summary['address'] = address
 
-    # ----------------------------------------------------------------
-    # Section parsing — uses _is_section_header() so prose sentences
-    # that merely mention "experience" / "project" never open a section.
-    # Pattern: when we detect a header we set the flag and SKIP that line
-    #          (continue before any append). When we detect the NEXT
-    #          section header we close the current section and also skip
-    #          that line. Content lines are only added when we're inside
-    #          the section AND the line is non-empty AND not a header.
-    # ----------------------------------------------------------------
-    EXP_HDRS  = ['experience', 'work experience', 'employment', 'work history', 'internship']
-    PROJ_HDRS = ['project', 'projects', 'personal projects', 'key projects']
-    CERT_HDRS = ['certification', 'certifications', 'certificate', 'certificates',
-                 'courses', 'awards', 'achievements']
-    ANY_SECTION = EXP_HDRS + PROJ_HDRS + CERT_HDRS + [
-        'education', 'skills', 'technical skills', 'summary', 'objective',
-        'about', 'languages', 'hobbies', 'interests', 'references', 'volunteer'
-    ]
-
-    # --- Projects ---
-    projects = []
-    tech_stack = []
-    in_projects = False
-    for line in lines:
-        stripped = line.strip()
-        if not stripped:
-            in_projects = False if in_projects and not stripped else in_projects
-            continue
-        lower = stripped.lower()
-        if not in_projects:
-            if _is_section_header(stripped, PROJ_HDRS):
-                in_projects = True
-            continue  # skip every line until we're inside a section
-        # ---- we ARE inside projects ----
-        if _is_section_header(stripped, ANY_SECTION):
-            in_projects = False
-            continue  # skip this header
-        projects.append(stripped)
-        for skill in COMMON_SKILLS:
-            if skill.lower() in lower and skill not in tech_stack:
-                tech_stack.append(skill)
-    summary['projects'] = projects
-    summary['tech_stack'] = tech_stack
-
-    # --- Work Experience ---
-    work_exp = []
-    in_exp = False
-    for line in lines:
-        stripped = line.strip()
-        if not stripped:
+    # --- Projects / Work Experience / Certifications ---
+    # Lines were labelled once by segment_resume(); see its docstring for
+    # how headings open and close each section.
+    sections = document.segments['sections']
+    summary['projects'] = [lines[i] for i in sections['projects']]
+    project_text = '\n'.join(lowered_lines[i] for i in sections['projects'])
+    summary['tech_stack'] = list(dict.fromkeys(
+        skill for _, _, skill in current_taxonomy().tech_stack_automaton.finditer(project_text)
+    ))
+    summary['work_experience'] = [lines[i] for i in sections['work_experience']]
+    summary['certifications'] = [lines[i] for i in sections['certifications']]
+    if document.truncated:
+        summary['truncated'] = True
+
+    return summary
+
+# --- Near-Duplicate Resumes ---
+# The same candidate often arrives several times as slightly different files
+# (a re-exported PDF, a new phone number). With dedupe on, a resume whose
+# MinHash similarity to one already processed is at least DEDUPE_THRESHOLD
+# reuses that resume's extracted skills instead of going through spaCy, and
+# is reported with ``duplicate_of`` and ``similarity``. The index lives in
+# each worker and keeps the newest DEDUPE_MAX_ENTRIES resumes.
+app.config['DEDUPE_THRESHOLD'] = float(os.environ.get('DEDUPE_THRESHOLD', 0.9))
+app.config['DEDUPE_MAX_ENTRIES'] = int(os.environ.get('DEDUPE_MAX_ENTRIES', 10000))
+
+minhasher = MinHasher()
+resume_index = LSHIndex(num_perm=minhasher.num_perm, max_entries=app.config['DEDUPE_MAX_ENTRIES'])
+
+# --- Batch Analysis ---
+def iter_batch_analysis(files, job_description=None, batch_size=None, engine=None, dedupe=False, sections=False):
+    """Yields one ``{'filename', 'analysis'}`` or ``{'filename', 'error'}`` dict per upload, in order.
+
+    Text extraction is per file, but every resume goes through a single
+    nlp.pipe() stream and the job description is analyzed only once. Files are
+    extracted lazily as the pipe pulls them, so at most one pipe batch of
+    texts is alive at a time. With the NLP pool enabled, each pipe batch is
+    one pool task instead, and PoolSaturated propagates to the caller. With
+    ``dedupe``, near-duplicates of earlier resumes skip skill extraction and
+    also carry ``duplicate_of`` and ``similarity``. With ``sections``,
+    analyses also carry ``sections``: the segment_resume() sections that have
+    at least one line.
+    """
+    engine = engine or app.config['SKILL_ENGINE']
+    jd_analysis = analyze_job_description_pooled(job_description, engine) if job_description else None
+    # Parity reports describe one text's extraction, so they are never reused
+    dedupe = dedupe and engine != 'parity'
+    context = (current_taxonomy().version, engine)
+    threshold = app.config['DEDUPE_THRESHOLD']
+    # Files of this batch whose skills are still on their way through the pipe
+    pending = LSHIndex(num_perm=minhasher.num_perm)
+    # Items stay here; only their position goes through the pipe, which
+    # pickles contexts to and from its worker processes when NLP_N_PROCESS > 1.
+    items = {}
+
+    def prepared():
+        for position, file in enumerate(files):
+            items[position] = item = {'filename': file.filename}
+            if file.filename == '' or not allowed_file(file.filename):
+                item['error'] = 'Invalid file format. Only PDF and DOCX files are allowed'
+                yield "", position
+                continue
+            item['filename'] = filename = secure_filename(file.filename)
+            try:
+                item['document'] = document = ResumeDocument(*extract_text_cached(file.stream, filename))
+            except Exception as e:
+                logger.exception("Error reading %s in batch", filename)
+                item['error'] = f"Could not read file: {e}"
+                yield "", position
+                continue
+            # Failed extractions all read alike; they are not duplicates of each other
+            signature = document.signature if dedupe and not document.text.startswith("Error reading ") else None
+            if signature is not None:
+                match = resume_index.query(signature, threshold, context) or pending.query(signature, threshold)
+                if match is not None:
+                    item['original'], item['similarity'] = match
+                    # Nothing for the pipe to do; the skills come from the original
+                    yield "", position
+                    continue
+                item['signature'] = signature
+                item['entry'] = {'filename': filename, 'skills': None}
+                pending.add(signature, item['entry'])
+            yield document, position
+
+    if engine == 'spacy' and nlp_inline():
+        scored = extract_skills_batch(prepared(), batch_size=batch_size, as_tuples=True)
+    elif engine == 'spacy':
+        scored = _skills_batches_in_pool(prepared(), batch_size or app.config['NLP_BATCH_SIZE'])
+    else:
+        # The automaton is cheap per document; analyze_resume() extracts inline.
+        scored = ((None, position) for _, position in prepared())
+    for resume_skills, position in scored:
+        item = items.pop(position)
+        if 'error' in item:
+            yield item
             continue
-        if not in_exp:
-            if _is_section_header(stripped, EXP_HDRS):
-                in_exp = True
-            continue  # skip every line until we enter the section
-        # ---- we ARE inside work experience ----
-        if _is_section_header(stripped, ANY_SECTION):
-            in_exp = False
-            continue  # skip this header
-        work_exp.append(stripped)
-    summary['work_experience'] = work_exp
-
-    # --- Certifications ---
-    certifications = []
-    in_cert = False
-    for line in lines:
-        stripped = line.strip()
-        if not stripped:
+        original = item.get('original')
+        try:
+            if original is not None:
+                # None if the original failed; extract this copy's own skills then
+                resume_skills = original['skills']
+            elif 'entry' in item and resume_skills is None:
+                resume_skills = extract_skills(item['document'], engine)
+            if engine == 'parity' and resume_skills is None and not nlp_inline():
+                # Parity runs both engines on each file, so the whole analysis is the task
+                document = item['document']
+                analysis = run_nlp_task(_analysis_task, document.text, document.truncated, job_description, engine)
+            else:
+                analysis = analyze_resume(item['document'], job_description, resume_skills=resume_skills,
+                                          jd_analysis=jd_analysis, engine=engine)
+        except PoolSaturated:
+            raise
+        except Exception as e:
+            logger.exception("Error analyzing %s in batch", item['filename'])
+            yield {'filename': item['filename'], 'error': f"Analysis failed: {e}"}
             continue
-        if not in_cert:
-            if _is_section_header(stripped, CERT_HDRS):
-                in_cert = True
-            continue  # skip every line until we enter the section
-        # ---- we ARE inside certifications ----
-        if _is_section_header(stripped, ANY_SECTION):
-            in_cert = False
-            continue  # skip this header
-        certifications.append(stripped)
-    summary['certifications'] = certifications
+        if 'entry' in item:
+            item['entry']['skills'] = resume_skills
+            resume_index.add(item['signature'], item['entry'], context)
+        if sections:
+            analysis['sections'] = [name for name, lines in item['document'].segments['sections'].items() if lines]
+        result = {'filename': item['filename'], 'analysis': analysis}
+        if original is not None:
+            result['duplicate_of'] = original['filename']
+            result['similarity'] = round(item['similarity'], 3)
+        yield result
+
+def _skills_batches_in_pool(pairs, batch_size):
+    """extract_skills_batch(pairs, as_tuples=True) with every ``batch_size`` texts sent to nlp_pool as one task.
+
+    Placeholders that are not a ResumeDocument (failed or duplicate files)
+    are not sent and come back with ``None`` skills.
+    """
+    pairs = iter(pairs)
+    while True:
+        group = list(itertools.islice(pairs, batch_size))
+        if not group:
+            return
+        texts = [document.text for document, _ in group if isinstance(document, ResumeDocument)]
+        skills = iter(run_nlp_task(_skills_batch_task, texts, batch_size) if texts else ())
+        for document, position in group:
+            yield (next(skills) if isinstance(document, ResumeDocument) else None), position
+
+# --- Candidate Ranking ---
+# Stored candidates are scored against one job description in a single pass
+# over a candidates x skills matrix instead of one analyze_resume() each.
+# The pool holds only resumes sent to POST /candidates; uploads to /analyze,
+# /analyze_batch, /report and /jobs are analyzed without being stored.
+app.config['CANDIDATE_DB_PATH'] = (os.environ.get('CANDIDATE_DB_PATH') or
+                                   os.path.join(tempfile.gettempdir(), 'ats_candidates.sqlite3'))
+app.config['RANK_DEFAULT_K'] = int(os.environ.get('RANK_DEFAULT_K', 10))
+app.config['RANK_MAX_K'] = int(os.environ.get('RANK_MAX_K', 500))
+
+candidate_store = CandidateStore(app.config['CANDIDATE_DB_PATH'])
+candidate_matrix = CandidateMatrix()
+candidate_index = CandidateIndex()
+app.config['SEARCH_PER_PAGE'] = int(os.environ.get('SEARCH_PER_PAGE', 20))
+app.config['SEARCH_MAX_PER_PAGE'] = int(os.environ.get('SEARCH_MAX_PER_PAGE', 100))
+
+def _bits_vector(bits, index):
+    """A taxonomy index bitset as a 0/1 column vector."""
+    vector = np.zeros(len(index), dtype=np.float32)
+    vector[list(index.iter_ids(bits))] = 1.0
+    return vector
+
+def score_candidate_matrix(matrix, jd_analysis, taxonomy):
+    """Vectorized score_skill_match(*match_skill_bits(row, jd_analysis)) for every matrix row."""
+    index = taxonomy.index
+    communication_bit, software_development_bit, software_development_evidence = _special_bits(taxonomy)
+    required_bits = jd_analysis['required_bits']
+    required = _bits_vector(required_bits, index)
+    hard = _bits_vector(index.hard_mask, index)
+    matched = (matrix @ required).astype(np.float64)
+    matched_hard = (matrix @ (required * hard)).astype(np.float64)
+    n_required = np.full(len(matrix), required.sum(), dtype=np.float64)
+    n_required_hard = np.full(len(matrix), (required * hard).sum(), dtype=np.float64)
+
+    # Communication becomes required (and matched) only for resumes that list it
+    if jd_analysis['mentions_communication'] and communication_bit and not required_bits & communication_bit:
+        has_communication = matrix[:, index.ids["communication"]]
+        n_required += has_communication
+        matched += has_communication
+        if communication_bit & index.hard_mask:
+            n_required_hard += has_communication
+            matched_hard += has_communication
+    # Broad development experience counts as "software development"
+    if required_bits & software_development_bit:
+        evidence = matrix[:, list(index.iter_ids(software_development_evidence))].any(axis=1)
+        credited = evidence & (matrix[:, index.ids["software development"]] == 0)
+        matched += credited
+        if software_development_bit & index.hard_mask:
+            matched_hard += credited
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = np.where(n_required_hard > 0, matched_hard / n_required_hard, matched / n_required) * 100
+    return np.where(n_required > 0, scores, np.where(matrix.any(axis=1), 10.0, 0.0))
+
+def rank_candidates(jd_analysis, k):
+    """Returns the ``k`` best stored candidates for a job description and the pool size."""
+    taxonomy = current_taxonomy()
+    index = taxonomy.index
+    ids, filenames, matrix = candidate_matrix.refresh(candidate_store, index)
+    if not len(ids):
+        return [], 0
+    scores = score_candidate_matrix(matrix, jd_analysis, taxonomy)
+    k = min(k, len(ids))
+    # Select in O(n), then sort only the shortlist; ties at the cut-off go to
+    # the oldest candidates so results don't depend on partition order.
+    cutoff = scores[np.argpartition(-scores, k - 1)[k - 1]]
+    top = np.flatnonzero(scores >= cutoff)
+    top = top[np.lexsort((ids[top], -scores[top]))][:k]
+
+    hard_mask = index.hard_mask
+    ranked = []
+    for rank, row in enumerate(top, start=1):
+        resume_bits = index.to_bits(index.skills[i] for i in np.flatnonzero(matrix[row]))
+        _, _, matching_bits, missing_bits, _ = match_skill_bits(resume_bits, jd_analysis)
+        ranked.append({
+            'rank': rank,
+            'candidate_id': int(ids[row]),
+            'filename': filenames[row],
+            'overall_score': f"{scores[row]:.2f}",
+            'matching_skills': index.to_skills(matching_bits & hard_mask),
+            'missing_skills': index.to_skills(missing_bits & hard_mask),
+        })
+    return ranked, len(ids)
+
+# --- Role Matching ---
+# Job descriptions registered up front keep their skills, so matching one
+# resume against all of them is one extraction plus bitset ops per role.
+app.config['ROLE_DB_PATH'] = (os.environ.get('ROLE_DB_PATH') or
+                              os.path.join(tempfile.gettempdir(), 'ats_roles.sqlite3'))
+
+role_store = RoleStore(app.config['ROLE_DB_PATH'])
+
+def _prepare_role(role):
+    """A stored role as the analyze_job_description() fields match_skill_bits() reads."""
+    taxonomy = current_taxonomy()
+    if role['taxonomy_version'] != taxonomy.version:
+        return analyze_job_description(role['job_description'])
+    required_skills = frozenset(role['required_skills'])
+    return {
+        'required_skills': required_skills,
+        'required_bits': taxonomy.index.to_bits(required_skills),
+        'mentions_communication': role['mentions_communication'],
+    }
 
-    return summary
+role_registry = RoleRegistry(_prepare_role)
+
+def register_role(title, job_description, engine=None):
+    """Analyzes a job description once (in the NLP pool) and stores it for match_roles()."""
+    jd_analysis = analyze_job_description_pooled(job_description, engine)
+    role_id = role_store.add(title, job_description.strip(), jd_analysis['required_skills'],
+                             jd_analysis['mentions_communication'], current_taxonomy().version)
+    return role_id, jd_analysis
+
+def match_roles(resume_skills, k=None):
+    """Scores a resume's skills against every registered role, best first."""
+    taxonomy = current_taxonomy()
+    index = taxonomy.index
+    resume_bits = index.to_bits(resume_skills) & index.common_mask
+    hard_mask = index.hard_mask
+    scored = []
+    for role, jd_analysis in role_registry.refresh(role_store, taxonomy.version):
+        bits, required_bits, matching_bits, missing_bits, _ = match_skill_bits(resume_bits, jd_analysis)
+        scored.append((score_skill_match(bits, required_bits, matching_bits), role['role_id'], role['title'],
+                       matching_bits & hard_mask, missing_bits & hard_mask))
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [{
+        'rank': rank,
+        'role_id': role_id,
+        'title': title,
+        'overall_score': f"{score:.2f}",
+        'matching_skills': index.to_skills(matching_bits),
+        'missing_skills': index.to_skills(missing_bits),
+    } for rank, (score, role_id, title, matching_bits, missing_bits) in enumerate(scored[:k], start=1)]
+
+# --- NLP Process Pool ---
+# With NLP_POOL_WORKERS > 0 the CPU-bound analysis runs in child processes,
+# each holding its own model, instead of on the request thread. At most
+# NLP_POOL_QUEUE tasks may be in flight per web worker; beyond that requests
+# are rejected with 503 + Retry-After rather than queued without bound.
+app.config['NLP_POOL_WORKERS'] = int(os.environ.get('NLP_POOL_WORKERS', 0))
+app.config['NLP_POOL_QUEUE'] = int(os.environ.get('NLP_POOL_QUEUE', max(app.config['NLP_POOL_WORKERS'], 1) * 4))
+app.config['NLP_POOL_RETRY_AFTER'] = int(os.environ.get('NLP_POOL_RETRY_AFTER', 5))
+# "fork" lets children inherit a preloaded model; "forkserver"/"spawn" re-import the app.
+app.config['NLP_POOL_START_METHOD'] = os.environ.get('NLP_POOL_START_METHOD', 'fork')
+
+class PoolSaturated(Exception):
+    """Raised when a BoundedProcessPool already has its limit of tasks in flight."""
+
+POOL_BUSY_ERROR = 'Server is busy analyzing other resumes. Please retry shortly.'
+
+class BoundedProcessPool:
+    """ProcessPoolExecutor that refuses work beyond ``max_pending`` in-flight tasks.
+
+    The executor is created lazily in each process that uses it, so a
+    gunicorn worker forked from a preloaded master never inherits one. If a
+    child dies (e.g. OOM-killed), its in-flight tasks fail with
+    BrokenProcessPool and the next submit() starts a fresh executor.
+    """
+
+    def __init__(self, workers, max_pending, start_method=None, initializer=None):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.start_method = start_method
+        self.initializer = initializer
+        self.in_flight = 0
+        self.rejected = 0
+        self.restarts = 0
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is not None and self._executor_pid == os.getpid() and self._executor._broken:
+            self._discard_executor()
+        if self._executor is None or self._executor_pid != os.getpid():
+            context = multiprocessing.get_context(self.start_method)
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                                 initializer=self.initializer)
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def _discard_executor(self):
+        executor, self._executor = self._executor, None
+        self.restarts += 1
+        log_event('pool_restarted', logging.WARNING, workers=self.workers, restarts=self.restarts)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, _future):
+        with self._lock:
+            self.in_flight -= 1
+
+    def submit(self, fn, *args):
+        """Schedules ``fn(*args)``; raises PoolSaturated instead of queueing when full."""
+        with self._lock:
+            if self.in_flight >= self.max_pending:
+                self.rejected += 1
+                raise PoolSaturated()
+            self.in_flight += 1
+            try:
+                try:
+                    future = self._get_executor().submit(fn, *args)
+                except BrokenProcessPool:
+                    # Broke after the _broken check above; retry once on a new executor
+                    self._discard_executor()
+                    future = self._get_executor().submit(fn, *args)
+            except Exception:
+                self.in_flight -= 1
+                raise
+        future.add_done_callback(self._release)
+        return future
+
+    def stats(self):
+        return {'workers': self.workers, 'queue_limit': self.max_pending,
+                'in_flight': self.in_flight, 'rejected': self.rejected, 'restarts': self.restarts}
+
+nlp_pool = BoundedProcessPool(app.config['NLP_POOL_WORKERS'], app.config['NLP_POOL_QUEUE'],
+                              app.config['NLP_POOL_START_METHOD'], initializer=warm_up_nlp)
+pdf_pool = BoundedProcessPool(app.config['PDF_WORKERS'], max(app.config['PDF_WORKERS'], 1) * 4,
+                              app.config['NLP_POOL_START_METHOD'])
+
+def run_nlp_task(fn, *args):
+    """Runs ``fn(*args)`` in the NLP pool and waits for it, or inline when the pool is disabled.
+
+    Raises PoolSaturated instead of queueing when the pool is full.
+    """
+    with STAGE_SECONDS.time('nlp_task'):
+        if nlp_inline():
+            return fn(*args)
+        return nlp_pool.submit(fn, *args).result()
+
+def nlp_inline():
+    """True when NLP work runs on the request thread rather than in nlp_pool."""
+    # Profiled requests run inline so the profiler sees the actual work.
+    return app.config['NLP_POOL_WORKERS'] <= 0 or g.get('profiling')
+
+def analyze_job_description_pooled(job_description, engine=None):
+    """analyze_job_description() as an NLP pool task.
+
+    The pool process may hold another taxonomy build than this request, so
+    ``required_bits`` is re-encoded here from the returned skills.
+    """
+    jd_analysis = run_nlp_task(_job_description_task, job_description, engine)
+    return dict(jd_analysis, required_bits=current_taxonomy().index.to_bits(jd_analysis['required_skills']))
+
+# Pool entry points take plain text and the extractor's truncated flag so only
+# strings cross the process boundary. Pool processes have no request to pin a
+# taxonomy to, so each task picks up a rebuilt artifact itself before it starts.
+def _analysis_task(text, truncated, job_description, engine):
+    taxonomy_loader.refresh()
+    return analyze_resume(ResumeDocument(text, truncated), job_description, engine=engine)
+
+def _skills_batch_task(texts, batch_size):
+    taxonomy_loader.refresh()
+    return list(extract_skills_batch(texts, batch_size=batch_size))
+
+def _job_description_task(job_description, engine):
+    taxonomy_loader.refresh()
+    return analyze_job_description(job_description, engine)
+
+def _summary_task(text, truncated):
+    taxonomy_loader.refresh()
+    return extract_resume_summary(ResumeDocument(text, truncated))
+
+def _report_task(text, truncated, job_description, parts, engine, resume_skills=None):
+    taxonomy_loader.refresh()
+    document = ResumeDocument(text, truncated)
+    payload = {}
+    if 'analysis' in parts:
+        payload['analysis'] = analyze_resume(document, job_description, resume_skills=resume_skills, engine=engine)
+    if 'summary' in parts:
+        payload['summary'] = extract_resume_summary(document)
+    return payload
+
+# --- Asynchronous Jobs ---
+# POST /jobs hands the upload to a local process pool and returns at once;
+# workers record status and results in a SQLite file shared by every web
+# worker, so GET /jobs/<id> can be served by any of them.
+app.config['JOBS_WORKERS'] = int(os.environ.get('JOBS_WORKERS', 1))
+app.config['JOBS_MAX_PENDING'] = int(os.environ.get('JOBS_MAX_PENDING', 32))
+app.config['JOBS_DB_PATH'] = os.environ.get('JOBS_DB_PATH') or os.path.join(tempfile.gettempdir(), 'ats_jobs.sqlite3')
+app.config['JOBS_TTL'] = float(os.environ.get('JOBS_TTL', 3600))
+
+job_store = JobStore(app.config['JOBS_DB_PATH'], ttl=app.config['JOBS_TTL'])
+job_pool = BoundedProcessPool(app.config['JOBS_WORKERS'], app.config['JOBS_MAX_PENDING'],
+                              app.config['NLP_POOL_START_METHOD'], initializer=warm_up_nlp)
+
+def _job_task(job_id, data, filename, job_description, parts, engine):
+    """Runs inside a job_pool process: extract, analyze and store the outcome.
+
+    Parsing and analysis share the process, so a PDF's skills are extracted
+    while its pages are parsed (see extract_text_and_skills()).
+    """
+    job_store.start(job_id)
+    try:
+        taxonomy_loader.refresh()
+        if 'analysis' in parts:
+            text, truncated, skills = extract_text_and_skills(io.BytesIO(data), filename, engine)
+        else:
+            (text, truncated), skills = extract_text_cached(io.BytesIO(data), filename), None
+        payload = _report_task(text, truncated, job_description, parts, engine, skills)
+    except Exception as e:
+        logger.exception("Error in job %s", job_id)
+        job_store.fail(job_id, f"Analysis failed: {e}")
+        return
+    job_store.finish(job_id, payload)
+
+def submit_job(data, filename, job_description, parts, engine):
+    """Queues a /report-style job and returns its id; raises PoolSaturated when full."""
+    job_store.purge_expired()
+    job_id = job_store.create()
+    try:
+        future = job_pool.submit(_job_task, job_id, data, filename, job_description, parts, engine)
+    except PoolSaturated:
+        job_store.fail(job_id, 'Rejected: job queue is full')
+        raise
+
+    def record_crash(done):
+        # Exceptions inside _job_task are stored by the task itself; this
+        # only catches the pool failing (e.g. a killed child process); the
+        # broken executor is replaced on the next submit.
+        if done.exception() is not None:
+            job_store.fail(job_id, f"Worker failed: {done.exception()}")
+    future.add_done_callback(record_crash)
+    return job_id
+
+def requested_engine():
+    """Reads the per-request ``engine`` override from the form or query string."""
+    engine = request.form.get('engine') or request.args.get('engine')
+    if engine and engine not in SKILL_ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'. Expected one of: {', '.join(SKILL_ENGINES)}")
+    return engine
+
+def requested_dedupe():
+    """Reads the ``dedupe`` flag (reuse analyses of near-duplicate resumes) from the form or query string."""
+    return (request.form.get('dedupe') or request.args.get('dedupe')) in ('1', 'true')
+
+# --- Scrape-time Gauges ---
+_CACHES = {'text': lambda: text_cache.stats()['memory'], 'jd': jd_cache.stats}
+_POOLS = {'nlp': nlp_pool, 'pdf': pdf_pool, 'jobs': job_pool}
+
+metrics.gauge('ats_cache_hit_ratio', 'Hit ratio of each in-memory cache.',
+              lambda: {(name,): stats()['hit_ratio'] for name, stats in _CACHES.items()}, ('cache',))
+metrics.gauge('ats_cache_entries', 'Entries held by each in-memory cache.',
+              lambda: {(name,): stats()['entries'] for name, stats in _CACHES.items()}, ('cache',))
+metrics.gauge('ats_pool_in_flight', 'Tasks queued or running in each process pool (queue depth).',
+              lambda: {(name,): pool.in_flight for name, pool in _POOLS.items()}, ('pool',))
+metrics.gauge('ats_pool_queue_limit', 'Maximum tasks in flight before a pool rejects work.',
+              lambda: {(name,): pool.max_pending for name, pool in _POOLS.items()}, ('pool',))
+metrics.gauge('ats_pool_rejected', 'Tasks rejected by each pool since start.',
+              lambda: {(name,): pool.rejected for name, pool in _POOLS.items()}, ('pool',))
+metrics.gauge('ats_pool_restarts', 'Executors replaced after a child process died, per pool.',
+              lambda: {(name,): pool.restarts for name, pool in _POOLS.items()}, ('pool',))
+metrics.gauge('ats_model_ready', '1 once the spaCy model is loaded.', lambda: int(model_state['ready']))
+metrics.gauge('ats_model_load_seconds', 'Time taken to load the spaCy model.', lambda: model_state['load_seconds'])
+
+# --- Request Profiling ---
+# With PROFILE_ENABLED=1, a request to a @profiled route carrying an
+# ``X-Profile: 1`` header or ``?profile=1`` (the PROFILE_TOKEN value instead
+# of 1, if one is set) is run under cProfile and its dump written to
+# PROFILE_DIR. See RequestProfiler for the sampling limits.
+app.config['PROFILE_ENABLED'] = os.environ.get('PROFILE_ENABLED') == '1'
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'ats_profiles')
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 1.0))
+app.config['PROFILE_MIN_INTERVAL'] = float(os.environ.get('PROFILE_MIN_INTERVAL', 10))
+app.config['PROFILE_MAX_FILES'] = int(os.environ.get('PROFILE_MAX_FILES', 50))
+app.config['PROFILE_TOKEN'] = os.environ.get('PROFILE_TOKEN') or None
+
+request_profiler = RequestProfiler(
+    app.config['PROFILE_DIR'],
+    sample_rate=app.config['PROFILE_SAMPLE_RATE'],
+    min_interval=app.config['PROFILE_MIN_INTERVAL'],
+    max_files=app.config['PROFILE_MAX_FILES'],
+)
+
+def profiling_requested():
+    if not app.config['PROFILE_ENABLED']:
+        return False
+    flag = request.headers.get('X-Profile') or request.args.get('profile')
+    if not flag:
+        return False
+    token = app.config['PROFILE_TOKEN']
+    return flag == token if token else flag in ('1', 'true')
+
+def profiled(view):
+    """Runs the route under the request profiler when profiling_requested().
+
+    The dump's file name is returned in the ``X-Profile-Dump`` header.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not profiling_requested() or not request_profiler.acquire():
+            return view(*args, **kwargs)
+        g.profiling = True
+        try:
+            result, dump_name = request_profiler.run(request.endpoint, view, *args, **kwargs)
+        finally:
+            request_profiler.release()
+        response = app.make_response(result)
+        response.headers['X-Profile-Dump'] = dump_name
+        return response
+    return wrapper
 
 # --- Flask Routes ---
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.before_request
+def pin_taxonomy():
+    # One taxonomy per request, even if a new artifact is swapped in midway
+    g.taxonomy = taxonomy_loader.refresh()
+
+@app.after_request
+def record_request_latency(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, request.endpoint or 'unknown', response.status_code)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.errorhandler(PoolSaturated)
+def pool_saturated(e):
+    response = jsonify({'error': POOL_BUSY_ERROR})
+    response.headers['Retry-After'] = str(app.config['NLP_POOL_RETRY_AFTER'])
+    return response, 503
+
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({'status': 'ok'}), 200
+    """Liveness plus model readiness.
+
+    ``?ready=1`` answers 503 until the model is loaded, and starts loading
+    it in the background if nothing has yet.
+    """
+    readiness = request.args.get('ready') in ('1', 'true')
+    if readiness:
+        load_model_in_background()
+    payload = {
+        'status': model_status(),
+        'model': model_state,
+        'text_cache': text_cache.stats(),
+        'jd_cache': jd_cache.stats(),
+        'nlp_pool': nlp_pool.stats(),
+        'job_pool': job_pool.stats(),
+        'taxonomy': taxonomy_loader.stats(),
+        'dedupe': resume_index.stats(),
+    }
+    if readiness and not model_state['ready']:
+        return jsonify(payload), 503
+    return jsonify(payload), 200
 
 @app.route('/', methods=['GET'])
 def health_check():
     return jsonify({'status': 'healthy', 'message': 'ATS Backend is running'}), 200
 
 @app.route('/analyze', methods=['POST'])
+@profiled
 def analyze():
     try:
         if 'file' not in request.files:
             return jsonify({'error': 'No file part in the request'}), 400
         file = request.files['file']
         job_description = request.form.get('job_description')
+        try:
+            engine = requested_engine()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
         if file.filename == '':
             return jsonify({'error': 'No selected file'}), 400
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
-            try:
-                text = extract_text(filepath)
-            finally:
-                if os.path.exists(filepath):
-                    os.remove(filepath)
-            
-            analysis_results = analyze_resume(text, job_description)
+            text, truncated = extract_text_cached(file.stream, filename)
+
+            analysis_results = run_nlp_task(_analysis_task, text, truncated, job_description, engine)
             return jsonify({'filename': filename, 'analysis': analysis_results}), 200
         return jsonify({'error': 'Invalid file format. Only PDF and DOCX files are allowed'}), 400
+    except PoolSaturated:
+        raise
     except Exception as e:
-        print(f"Error in analyze route: {str(e)}")
-        # Log the full traceback if possible in a real app
+        logger.exception("Error in analyze route")
         return jsonify({'error': f"Internal Server Error: {str(e)}"}), 500
 
+@app.route('/analyze_batch', methods=['POST'])
+def analyze_batch():
+    try:
+        files = request.files.getlist('files') or request.files.getlist('file')
+        if not files:
+            return jsonify({'error': 'No files in the request'}), 400
+        job_description = request.form.get('job_description')
+        try:
+            engine = requested_engine()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        dedupe = requested_dedupe()
+        if request.args.get('stream') in ('1', 'true') or request.accept_mimetypes.best == 'application/x-ndjson':
+            results = iter_batch_analysis(files, job_description, batch_size=app.config['NLP_STREAM_BATCH_SIZE'],
+                                          engine=engine, dedupe=dedupe)
+            # Score the first resume before any header is sent, so a full pool still answers 503
+            first = next(results)
+            return Response(stream_with_context(_ndjson_batch(first, results)), mimetype='application/x-ndjson')
+        results = list(iter_batch_analysis(files, job_description, engine=engine, dedupe=dedupe))
+        return jsonify({'results': results}), 200
+    except PoolSaturated:
+        raise
+    except Exception as e:
+        logger.exception("Error in analyze_batch route")
+        return jsonify({'error': f"Internal Server Error: {str(e)}"}), 500
+
+def _ndjson_batch(first, results):
+    """Emits one JSON line per resume as soon as it is scored, starting with ``first``."""
+    try:
+        yield json.dumps(first) + "\n"
+        for item in results:
+            yield json.dumps(item) + "\n"
+    except PoolSaturated:
+        # Headers are already sent; the client retries the files it has no line for.
+        yield json.dumps({'error': POOL_BUSY_ERROR}) + "\n"
+    except Exception as e:
+        # Headers are already sent, so a failure can only be reported inline.
+        logger.exception("Error in analyze_batch stream")
+        yield json.dumps({'error': f"Internal Server Error: {str(e)}"}) + "\n"
+
 @app.route('/resume_summary', methods=['POST'])
+@profiled
 def resume_summary():
     try:
         if 'file' not in request.files:
@@ -640,27 +1755,253 @@ def resume_summary():
             return jsonify({'error': 'No selected file'}), 400
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
-            
-            try:
-                text = extract_text(filepath)
-            finally:
-                if os.path.exists(filepath):
-                    os.remove(filepath)
+            text, truncated = extract_text_cached(file.stream, filename)
 
             # Extract structured summary using the helper function
-            summary_data = extract_resume_summary(text)
-            
+            summary_data = run_nlp_task(_summary_task, text, truncated)
+
             return jsonify({'summary': summary_data}), 200
         return jsonify({'error': 'Invalid file format'}), 400
+    except PoolSaturated:
+        raise
+    except Exception as e:
+        logger.exception("Error in resume_summary")
+        return jsonify({'error': f"Internal Server Error: {str(e)}"}), 500
+
+
+REPORT_PARTS = ('analysis', 'summary')
+
+def requested_parts():
+    """Parses the comma-separated ``parts`` selector of /report and /jobs."""
+    raw_parts = request.form.get('parts') or request.args.get('parts') or ','.join(REPORT_PARTS)
+    parts = {part.strip() for part in raw_parts.split(',') if part.strip()}
+    if not parts or parts - set(REPORT_PARTS):
+        raise ValueError(f"Invalid parts. Choose from: {', '.join(REPORT_PARTS)}")
+    return parts
+
+@app.route('/report', methods=['POST'])
+def report():
+    """Runs /analyze and /resume_summary on one upload, extracting its text only once."""
+    try:
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file part in the request'}), 400
+        file = request.files['file']
+        job_description = request.form.get('job_description')
+        try:
+            parts = requested_parts()
+            engine = requested_engine()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if file.filename == '':
+            return jsonify({'error': 'No selected file'}), 400
+        if file and allowed_file(file.filename):
+            filename = secure_filename(file.filename)
+            text, truncated = extract_text_cached(file.stream, filename)
+
+            payload = {'filename': filename}
+            payload.update(run_nlp_task(_report_task, text, truncated, job_description, parts, engine))
+            return jsonify(payload), 200
+        return jsonify({'error': 'Invalid file format. Only PDF and DOCX files are allowed'}), 400
+    except PoolSaturated:
+        raise
+    except Exception as e:
+        logger.exception("Error in report route")
+        return jsonify({'error': f"Internal Server Error: {str(e)}"}), 500
+
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """Queues a /report job for a (possibly slow) upload and returns its id immediately."""
+    try:
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file part in the request'}), 400
+        file = request.files['file']
+        job_description = request.form.get('job_description')
+        try:
+            parts = requested_parts()
+            engine = requested_engine()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if file.filename == '':
+            return jsonify({'error': 'No selected file'}), 400
+        if file and allowed_file(file.filename):
+            filename = secure_filename(file.filename)
+            job_id = submit_job(file.stream.read(), filename, job_description, parts, engine)
+            response = jsonify({'job_id': job_id, 'status': 'queued', 'filename': filename})
+            response.headers['Location'] = f"/jobs/{job_id}"
+            return response, 202
+        return jsonify({'error': 'Invalid file format. Only PDF and DOCX files are allowed'}), 400
+    except PoolSaturated:
+        raise
     except Exception as e:
-        print(f"Error in resume_summary: {str(e)}")
+        logger.exception("Error in create_job route")
         return jsonify({'error': f"Internal Server Error: {str(e)}"}), 500
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    return jsonify(job), 200
 
 
+@app.route('/candidates', methods=['POST'])
+def add_candidates():
+    """Analyzes uploaded resumes and adds their skill profiles to the candidate pool.
+
+    Only resumes posted here are stored; the analysis routes do not add to it.
+    """
+    try:
+        files = request.files.getlist('files') or request.files.getlist('file')
+        if not files:
+            return jsonify({'error': 'No files in the request'}), 400
+        try:
+            engine = requested_engine()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        # Analyze every file before storing any, so a 503 leaves nothing half-added
+        results = list(iter_batch_analysis(files, engine=engine, dedupe=requested_dedupe(), sections=True))
+        for item in results:
+            if 'error' not in item:
+                analysis = item.pop('analysis')
+                skills = analysis['extracted_skills']
+                # Stored as search terms, e.g. section:work_experience
+                sections = analysis['sections']
+                item['candidate_id'] = candidate_store.add(item['filename'], skills, sections)
+                item['skills'] = skills
+                item['sections'] = sections
+        return jsonify({'results': results}), 200
+    except PoolSaturated:
+        raise
+    except Exception as e:
+        logger.exception("Error in add_candidates route")
+        return jsonify({'error': f"Internal Server Error: {str(e)}"}), 500
+
+@app.route('/rank', methods=['POST'])
+def rank():
+    """Ranks every stored candidate against a job description and returns the top ``k``."""
+    try:
+        job_description = request.form.get('job_description')
+        if not job_description or not job_description.strip():
+            return jsonify({'error': 'A job_description is required'}), 400
+        try:
+            engine = requested_engine()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        k = request.form.get('k') or request.args.get('k') or str(app.config['RANK_DEFAULT_K'])
+        k = int(k) if k.isdigit() else 0
+        if not 1 <= k <= app.config['RANK_MAX_K']:
+            return jsonify({'error': f"k must be between 1 and {app.config['RANK_MAX_K']}"}), 400
+
+        jd_analysis = analyze_job_description_pooled(job_description, engine)
+        ranked, total = rank_candidates(jd_analysis, k)
+        return jsonify({
+            'required_skills': sorted(jd_analysis['required_skills']),
+            'total_candidates': total,
+            'results': ranked,
+        }), 200
+    except PoolSaturated:
+        raise
+    except Exception as e:
+        logger.exception("Error in rank route")
+        return jsonify({'error': f"Internal Server Error: {str(e)}"}), 500
+
+@app.route('/job_descriptions', methods=['POST'])
+def add_job_description():
+    """Registers a job description so /match can score resumes against it."""
+    try:
+        job_description = request.form.get('job_description')
+        if not job_description or not job_description.strip():
+            return jsonify({'error': 'A job_description is required'}), 400
+        title = (request.form.get('title') or '').strip() or job_description.strip().splitlines()[0][:120]
+        try:
+            engine = requested_engine()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        role_id, jd_analysis = register_role(title, job_description, engine)
+        return jsonify({'role_id': role_id, 'title': title,
+                        'required_skills': sorted(jd_analysis['required_skills'])}), 201
+    except PoolSaturated:
+        raise
+    except Exception as e:
+        logger.exception("Error in add_job_description route")
+        return jsonify({'error': f"Internal Server Error: {str(e)}"}), 500
+
+@app.route('/job_descriptions', methods=['GET'])
+def list_job_descriptions():
+    roles = role_registry.refresh(role_store, current_taxonomy().version)
+    return jsonify({'job_descriptions': [
+        {'role_id': role['role_id'], 'title': role['title'],
+         'required_skills': sorted(jd_analysis['required_skills'])}
+        for role, jd_analysis in roles
+    ]}), 200
+
+@app.route('/match', methods=['POST'])
+def match():
+    """Scores one resume against every registered job description, best fit first."""
+    try:
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file part in the request'}), 400
+        file = request.files['file']
+        try:
+            engine = requested_engine()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        k = request.form.get('k') or request.args.get('k')
+        if k is not None and not (k.isdigit() and int(k) >= 1):
+            return jsonify({'error': 'k must be a positive integer'}), 400
+
+        if file.filename == '':
+            return jsonify({'error': 'No selected file'}), 400
+        if file and allowed_file(file.filename):
+            filename = secure_filename(file.filename)
+            text, truncated = extract_text_cached(file.stream, filename)
+
+            resume_skills = run_nlp_task(_analysis_task, text, truncated, None, engine)['extracted_skills']
+            results = match_roles(resume_skills, int(k) if k else None)
+            return jsonify({'filename': filename, 'resume_skills': resume_skills, 'results': results}), 200
+        return jsonify({'error': 'Invalid file format. Only PDF and DOCX files are allowed'}), 400
+    except PoolSaturated:
+        raise
+    except Exception as e:
+        logger.exception("Error in match route")
+        return jsonify({'error': f"Internal Server Error: {str(e)}"}), 500
+
+def _page_arg(name, default):
+    value = request.args.get(name) or request.form.get(name) or str(default)
+    return int(value) if value.isdigit() else 0
+
+@app.route('/search', methods=['GET', 'POST'])
+def search():
+    """Boolean skill/section search over the candidate pool, e.g. ``q=react native AND firebase, NOT php``."""
+    try:
+        query = request.args.get('q') or request.form.get('q') or ''
+        page = _page_arg('page', 1)
+        per_page = _page_arg('per_page', app.config['SEARCH_PER_PAGE'])
+        if page < 1 or not 1 <= per_page <= app.config['SEARCH_MAX_PER_PAGE']:
+            return jsonify({'error': f"page must be >= 1 and per_page between 1 and {app.config['SEARCH_MAX_PER_PAGE']}"}), 400
+        try:
+            tree = parse_query(query, normalize=normalize_skill)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        candidate_index.refresh(candidate_store)
+        total, rows = candidate_index.search(tree, offset=(page - 1) * per_page, limit=per_page)
+        results = [{'candidate_id': candidate_id, 'filename': filename, 'skills': skills, 'sections': sections}
+                   for candidate_id, filename, skills, sections in rows]
+        return jsonify({'query': query, 'total': total, 'page': page, 'per_page': per_page,
+                        'results': results}), 200
+    except Exception as e:
+        logger.exception("Error in search route")
+        return jsonify({'error': f"Internal Server Error: {str(e)}"}), 500
 
+# --- Startup Warm-up ---
+# Set by gunicorn.conf.py so the model is loaded once in the master process.
+if os.environ.get('PRELOAD_MODEL') == '1':
+    warm_up_nlp()
+    model_state['preloaded'] = True
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1 @@
+"""Micro-benchmarks for the analysis stages; see benchmarks.run."""
@@ -0,0 +1,152 @@
+"""Deterministic synthetic resumes and job descriptions for benchmarking.
+
+The same ``seed`` always yields byte-identical PDF, DOCX and text inputs,
+so timings from different commits are measured on exactly the same data.
+The skill vocabulary is fixed here rather than read from app.py, so edits
+to the taxonomy change what is measured, not what is fed in.
+"""
+import io
+import random
+import zipfile
+
+SKILL_WORDS = (
+    "Python", "Java", "C++", "JavaScript", "TypeScript", "React", "React Native", "Node.js",
+    "Django", "Flask", "Spring Boot", "SQL", "PostgreSQL", "MySQL", "MongoDB", "Firebase",
+    "Docker", "Kubernetes", "AWS", "Azure", "Git", "Linux", "REST API", "GraphQL", "HTML",
+    "CSS", "Tailwind CSS", "Redux", "Pandas", "NumPy", "TensorFlow", "Machine Learning",
+    "Jira", "Agile", "Scrum", "CI/CD", "PHP", "Laravel", "communication", "leadership",
+)
+FILLER_WORDS = (
+    "worked", "with", "the", "team", "on", "delivering", "features", "for", "customers",
+    "across", "several", "releases", "and", "improved", "reliability", "of", "internal",
+    "tools", "while", "mentoring", "new", "members", "during", "quarterly", "planning",
+)
+SECTIONS = ("Summary", "Experience", "Projects", "Education", "Certifications", "Skills")
+
+# name -> (lines, skill density: fraction of body lines that mention skills)
+CASES = {
+    'short-sparse': (40, 0.1),
+    'short-dense': (40, 0.5),
+    'medium-dense': (150, 0.4),
+    'long-sparse': (600, 0.1),
+    'long-dense': (600, 0.5),
+}
+LINES_PER_PAGE = 50
+
+
+def resume_text(lines, density, seed=0):
+    """A resume of roughly ``lines`` lines split into the usual sections."""
+    rng = random.Random(f"resume:{lines}:{density}:{seed}")
+    out = [
+        "Jordan Example",
+        "jordan.example@example.com | +1 555-010-0199 | linkedin.com/in/jordan-example | github.com/jordan-example",
+    ]
+    per_section = max((lines - len(out)) // len(SECTIONS) - 1, 1)
+    for section in SECTIONS:
+        out.append(section)
+        for _ in range(per_section):
+            words = rng.sample(FILLER_WORDS, rng.randint(6, 12))
+            if rng.random() < density:
+                skills = rng.sample(SKILL_WORDS, rng.randint(1, 4))
+                at = rng.randrange(len(words))
+                words[at:at] = ["using", ", ".join(skills)]
+            out.append(" ".join(words).capitalize() + ".")
+        out.append("")
+    return "\n".join(out)
+
+
+def job_description_text(seed=0, skills=8):
+    rng = random.Random(f"jd:{seed}:{skills}")
+    required = rng.sample(SKILL_WORDS, skills)
+    return "\n".join([
+        "About the Company:",
+        "We build hiring tools.",
+        "",
+        "Requirements",
+        f"Strong {', '.join(required[:-2])} experience. Knowledge of {required[-2]} and {required[-1]}.",
+        "Good communication skills and software development experience.",
+        "",
+        "Benefits: remote friendly",
+    ])
+
+
+def _pdf_string(line):
+    return line.encode('latin-1', 'replace').replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def to_pdf(text):
+    """Renders text as a minimal Helvetica PDF, LINES_PER_PAGE lines per page."""
+    lines = text.split("\n")
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    objects = [None, None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in pages:
+        stream = b"BT /F1 9 Tf 14 TL 40 760 Td\n" + b"".join(b"(" + _pdf_string(l) + b") Tj T*\n" for l in page) + b"ET"
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 3 0 R >> >> >>" % len(objects)
+        )
+        kids.append(len(objects))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+_DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+_DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/></Relationships>'
+)
+
+
+def _xml_escape(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def to_docx(text):
+    """Renders text as a minimal DOCX with one paragraph per line."""
+    body = ''.join(f'<w:p><w:r><w:t xml:space="preserve">{_xml_escape(line)}</w:t></w:r></w:p>'
+                   for line in text.split("\n"))
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{body}</w:body></w:document>'
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in (('[Content_Types].xml', _DOCX_CONTENT_TYPES), ('_rels/.rels', _DOCX_RELS),
+                           ('word/document.xml', document)):
+            # Fixed timestamps keep the archive bytes reproducible
+            archive.writestr(zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0)), data,
+                             compress_type=zipfile.ZIP_DEFLATED)
+    return buffer.getvalue()
+
+
+def build_corpus(seed=0):
+    """Returns ``{case: {'text', 'pdf', 'docx'}}`` for every entry of CASES."""
+    corpus = {}
+    for name, (lines, density) in CASES.items():
+        text = resume_text(lines, density, seed)
+        corpus[name] = {'text': text, 'pdf': to_pdf(text), 'docx': to_docx(text)}
+    return corpus
@@ -0,0 +1,259 @@
+"""End-to-end load test of the upload routes.
+
+Fires multipart uploads at a fixed concurrency and reports latency
+percentiles, throughput, error rate and peak RSS. Run from the backend
+directory, against one of:
+
+    python -m benchmarks.loadtest --url http://127.0.0.1:5000
+    python -m benchmarks.loadtest --gunicorn --workers 1,2,4 --threads 1,4
+    python -m benchmarks.loadtest --test-client
+
+``--gunicorn`` starts gunicorn.conf.py once per workers x threads
+combination on a local port and reads each worker's peak RSS (VmHWM) from
+/proc, so it needs Linux. ``--test-client`` drives the app in-process and
+reports the peak RSS of this process instead. Uploads cycle through
+``--variants`` distinct synthetic resumes so the text cache cannot serve
+every request.
+"""
+import argparse
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.corpus import CASES, job_description_text, resume_text, to_docx, to_pdf  # noqa: E402
+
+ROUTES = ('/analyze', '/resume_summary')
+
+
+def build_uploads(case, file_format, variants):
+    """``variants`` distinct ``(filename, bytes)`` uploads of one corpus case."""
+    lines, density = CASES[case]
+    render = to_pdf if file_format == 'pdf' else to_docx
+    return [(f"resume-{seed}.{file_format}", render(resume_text(lines, density, seed)))
+            for seed in range(variants)]
+
+
+def encode_multipart(fields, file_field, filename, data):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+        f'Content-Type: application/octet-stream\r\n\r\n'.encode() + data + b'\r\n'
+    )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def http_sender(base_url, timeout):
+    def send(route, fields, filename, data):
+        body, content_type = encode_multipart(fields, 'file', filename, data)
+        req = urllib.request.Request(base_url + route, data=body, headers={'Content-Type': content_type})
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+    return send
+
+
+def test_client_sender():
+    import io
+    from app import app
+    client = app.test_client()
+
+    def send(route, fields, filename, data):
+        form = dict(fields, file=(io.BytesIO(data), filename))
+        return client.post(route, data=form, content_type='multipart/form-data').status_code
+    return send
+
+
+def run_load(send, route, uploads, job_description, concurrency, requests):
+    """Sends ``requests`` uploads from ``concurrency`` threads; returns the summary dict."""
+    fields = {'job_description': job_description} if route == '/analyze' else {}
+    counter = itertools.count()
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            i = next(counter)
+            if i >= requests:
+                return
+            filename, data = uploads[i % len(uploads)]
+            started = time.perf_counter()
+            try:
+                status = send(route, fields, filename, data)
+            except Exception as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if not isinstance(status, int) or status >= 400:
+                    errors.append(status)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    return {
+        'route': route,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'error_rate': round(len(errors) / len(latencies), 4) if latencies else 0.0,
+        'error_statuses': sorted({str(status) for status in errors}),
+        'rps': round(len(latencies) / wall, 2) if wall else 0.0,
+        'p50_ms': round(cuts[49] * 1000, 2),
+        'p95_ms': round(cuts[94] * 1000, 2),
+        'p99_ms': round(cuts[98] * 1000, 2),
+    }
+
+
+def _proc_kib(pid, field):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def _children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def start_gunicorn(workers, threads, port, extra_env=None):
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads))
+    env.update(extra_env or {})
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}', 'app:app'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {process.returncode}")
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/health?ready=1', timeout=2):
+                if len(_children(process.pid)) >= workers:
+                    return process
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError("gunicorn did not become ready within 120s")
+
+
+def stop_gunicorn(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def worker_peak_rss_mib(master_pid):
+    """Peak RSS (VmHWM) of each gunicorn worker, in MiB."""
+    peaks = {}
+    for pid in _children(master_pid):
+        kib = _proc_kib(pid, 'VmHWM')
+        if kib is not None:
+            peaks[pid] = round(kib / 1024, 1)
+    return peaks
+
+
+def self_peak_rss_mib():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux but bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _int_list(value):
+    return [int(part) for part in value.split(',') if part]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--url', help='base URL of a running server')
+    target.add_argument('--gunicorn', action='store_true', help='start a local gunicorn per configuration')
+    target.add_argument('--test-client', action='store_true', help="use Flask's in-process test client")
+    parser.add_argument('--route', action='append', choices=ROUTES, help='route to load (default: both)')
+    parser.add_argument('--concurrency', type=_int_list, default=[8], help='comma-separated, e.g. 1,8,32')
+    parser.add_argument('--requests', type=int, default=200, help='requests per route and concurrency')
+    parser.add_argument('--workers', type=_int_list, default=[2], help='gunicorn worker counts, e.g. 1,2,4')
+    parser.add_argument('--threads', type=_int_list, default=[1], help='gunicorn thread counts, e.g. 1,4')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--case', choices=sorted(CASES), default='medium-dense')
+    parser.add_argument('--format', choices=('pdf', 'docx'), default='pdf')
+    parser.add_argument('--variants', type=int, default=20)
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--json', metavar='PATH', help='also write the results as JSON')
+    args = parser.parse_args(argv)
+
+    uploads = build_uploads(args.case, args.format, args.variants)
+    job_description = job_description_text()
+    routes = args.route or list(ROUTES)
+    results = []
+
+    def load_all(send, setup):
+        for route in routes:
+            for concurrency in args.concurrency:
+                summary = dict(setup, **run_load(send, route, uploads, job_description, concurrency, args.requests))
+                results.append(summary)
+                print(json.dumps(summary))
+
+    if args.gunicorn:
+        for workers, threads in itertools.product(args.workers, args.threads):
+            process = start_gunicorn(workers, threads, args.port)
+            try:
+                load_all(http_sender(f'http://127.0.0.1:{args.port}', args.timeout),
+                         {'target': 'gunicorn', 'workers': workers, 'threads': threads})
+                peaks = worker_peak_rss_mib(process.pid)
+                print(json.dumps({'workers': workers, 'threads': threads, 'peak_rss_mib': peaks}))
+                for summary in results:
+                    if summary.get('workers') == workers and summary.get('threads') == threads:
+                        summary['peak_rss_mib'] = peaks
+            finally:
+                stop_gunicorn(process)
+    elif args.test_client:
+        load_all(test_client_sender(), {'target': 'test-client'})
+        print(json.dumps({'peak_rss_mib': self_peak_rss_mib()}))
+    else:
+        load_all(http_sender(args.url.rstrip('/'), args.timeout), {'target': args.url})
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 1 if any(summary['errors'] for summary in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Times each analysis stage on the synthetic corpus and checks for regressions.
+
+Run from the backend directory::
+
+    python -m benchmarks.run                          # print timings
+    python -m benchmarks.run --save baseline.json     # record a baseline
+    python -m benchmarks.run --check baseline.json    # exit 1 on a slowdown
+
+Every (stage, case) pair is run ``--repeat`` times after a warm-up call and
+its median is reported. ``--check`` fails when a median exceeds the
+baseline's by more than ``--threshold`` (a fraction, 0.25 = 25% slower).
+Baselines are only comparable on the same machine and model.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+from benchmarks.corpus import build_corpus, job_description_text  # noqa: E402
+
+
+def _stages(job_description):
+    """stage name -> (input kind, callable taking that input)."""
+    def analyze(text):
+        app.jd_cache.clear()  # measure the JD analysis too, not a cache hit
+        return app.analyze_resume(text, job_description, engine='spacy')
+
+    return {
+        'extract_text_from_pdf': ('pdf', lambda data: app.extract_text_from_pdf(io.BytesIO(data))),
+        'extract_text_from_docx': ('docx', lambda data: app.extract_text_from_docx(io.BytesIO(data))),
+        'extract_skills_with_ner_and_patterns': ('text', app.extract_skills_with_ner_and_patterns),
+        'analyze_resume': ('text', analyze),
+        'extract_resume_summary': ('text', app.extract_resume_summary),
+    }
+
+
+def run(repeat, seed=0, stages=None):
+    """Returns ``{stage: {case: median seconds}}``."""
+    corpus = build_corpus(seed)
+    job_description = job_description_text(seed)
+    app.get_nlp()
+    results = {}
+    for stage, (kind, fn) in _stages(job_description).items():
+        if stages and stage not in stages:
+            continue
+        results[stage] = {}
+        for case, inputs in corpus.items():
+            data = inputs[kind]
+            fn(data)
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                fn(data)
+                timings.append(time.perf_counter() - started)
+            results[stage][case] = statistics.median(timings)
+    return results
+
+
+def regressions(results, baseline, threshold):
+    """Lists ``(stage, case, baseline, current)`` for every median slower than allowed."""
+    slower = []
+    for stage, cases in results.items():
+        for case, seconds in cases.items():
+            before = baseline.get(stage, {}).get(case)
+            if before is not None and seconds > before * (1 + threshold):
+                slower.append((stage, case, before, seconds))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--stage', action='append', help='only run this stage (repeatable)')
+    parser.add_argument('--save', metavar='PATH', help='write the results as a JSON baseline')
+    parser.add_argument('--check', metavar='PATH', help='compare against a JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat, args.seed, args.stage)
+    for stage, cases in results.items():
+        for case, seconds in cases.items():
+            print(f"{stage:40} {case:14} {seconds * 1000:10.3f} ms")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'meta': {
+                    'python': platform.python_version(),
+                    'machine': platform.machine(),
+                    'taxonomy_version': app.current_taxonomy().version,
+                    'seed': args.seed,
+                    'repeat': args.repeat,
+                    'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                },
+                'stages': results,
+            }, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.save}")
+
+    if args.check:
+        with open(args.check) as f:
+            baseline = json.load(f)
+        slower = regressions(results, baseline['stages'], args.threshold)
+        for stage, case, before, seconds in slower:
+            print(f"REGRESSION {stage} [{case}]: {before * 1000:.3f} ms -> {seconds * 1000:.3f} ms "
+                  f"(+{(seconds / before - 1) * 100:.0f}%)")
+        if slower:
+            return 1
+        print(f"No stage slower than the baseline by more than {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
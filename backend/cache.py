@@ -0,0 +1,166 @@
+"""Small thread-safe caches shared by the analysis routes."""
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from sqlite_store import SQLiteStore
+
+_MISSING = object()
+
+
+def file_digest(stream, chunk_size=64 * 1024):
+    """Returns the SHA-256 hex digest of a binary stream and rewinds it."""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """Least-recently-used cache bounded by entry count and/or total size.
+
+    ``sizeof`` measures a value for the ``max_bytes`` budget. Entries older
+    than ``ttl`` seconds are treated as misses and dropped on access.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, ttl=None, sizeof=sys.getsizeof):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self._data = OrderedDict()  # key -> (value, size, stored_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING and self.ttl is not None and time.monotonic() - entry[2] > self.ttl:
+                self._pop(key)
+                entry = _MISSING
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            self._data[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while self._data and (
+                (self.max_entries is not None and len(self._data) > self.max_entries) or
+                (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                self._pop(next(iter(self._data)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _pop(self, key):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class TextCache(SQLiteStore):
+    """Content-addressed cache of extracted document text.
+
+    Entries are ``(text, truncated)`` pairs, ``truncated`` telling whether
+    the extractor left part of the document out. A bounded in-memory LRU sits in front of an optional SQLite file that
+    survives worker restarts and is shared by all workers on the host. The
+    disk tier evicts least-recently-read rows once ``max_disk_bytes`` of text
+    is stored.
+    """
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS texts ('
+        'digest TEXT PRIMARY KEY, text TEXT NOT NULL, '
+        'size INTEGER NOT NULL, accessed REAL NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS texts_accessed ON texts (accessed)',
+    )
+
+    def _migrate(self, conn):
+        self._add_column(conn, 'texts', 'truncated', 'INTEGER NOT NULL DEFAULT 0')
+
+    def __init__(self, max_memory_bytes, disk_path=None, max_disk_bytes=None):
+        super().__init__(disk_path)
+        self.memory = LRUCache(max_bytes=max_memory_bytes, sizeof=lambda entry: sys.getsizeof(entry[0]))
+        self.disk_path = disk_path
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_hits = 0
+        self.disk_misses = 0
+
+    def get(self, digest):
+        """Returns the ``(text, truncated)`` stored under ``digest``, or None."""
+        entry = self.memory.get(digest)
+        if entry is not None or not self.disk_path:
+            return entry
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute('SELECT text, truncated FROM texts WHERE digest = ?', (digest,)).fetchone()
+            if row is None:
+                self.disk_misses += 1
+                return None
+            self.disk_hits += 1
+            conn.execute('UPDATE texts SET accessed = ? WHERE digest = ?', (time.time(), digest))
+            conn.commit()
+        entry = (row[0], bool(row[1]))
+        self.memory.set(digest, entry)
+        return entry
+
+    def set(self, digest, text, truncated=False):
+        self.memory.set(digest, (text, truncated))
+        if not self.disk_path:
+            return
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO texts (digest, text, truncated, size, accessed) VALUES (?, ?, ?, ?, ?)',
+                (digest, text, int(truncated), len(text), time.time())
+            )
+            if self.max_disk_bytes is not None:
+                total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM texts').fetchone()[0]
+                while total > self.max_disk_bytes:
+                    row = conn.execute('SELECT digest, size FROM texts ORDER BY accessed LIMIT 1').fetchone()
+                    if row is None:
+                        break
+                    conn.execute('DELETE FROM texts WHERE digest = ?', (row[0],))
+                    total -= row[1]
+            conn.commit()
+
+    def stats(self):
+        stats = {'memory': self.memory.stats()}
+        if self.disk_path:
+            stats['disk'] = {'hits': self.disk_hits, 'misses': self.disk_misses}
+        return stats
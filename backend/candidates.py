@@ -0,0 +1,222 @@
+"""Persistent pool of analyzed candidates and its in-memory views.
+
+Profiles are stored as skill names, not ids, so they survive taxonomy
+changes; CandidateMatrix re-encodes them against the current SkillIndex for
+ranking, and CandidateIndex keeps boolean-searchable posting lists.
+"""
+import json
+import re
+import threading
+import time
+
+import numpy as np
+
+from sqlite_store import SQLiteStore
+
+
+class CandidateStore(SQLiteStore):
+    """SQLite table of candidate skill profiles, shared by all workers on the host."""
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS candidates ('
+        'id INTEGER PRIMARY KEY AUTOINCREMENT, filename TEXT NOT NULL, '
+        'skills TEXT NOT NULL, created REAL NOT NULL)',
+    )
+
+    def _migrate(self, conn):
+        self._add_column(conn, 'candidates', 'sections', "TEXT NOT NULL DEFAULT '[]'")
+
+    def add(self, filename, skills, sections=()):
+        """Stores one profile and returns its candidate id."""
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(
+                'INSERT INTO candidates (filename, skills, sections, created) VALUES (?, ?, ?, ?)',
+                (filename, json.dumps(sorted(skills)), json.dumps(sorted(sections)), time.time())
+            )
+            conn.commit()
+            return cursor.lastrowid
+
+    def since(self, last_id):
+        """Returns ``(id, filename, skills, sections)`` rows with an id above ``last_id``, in id order."""
+        with self._lock:
+            rows = self._connection().execute(
+                'SELECT id, filename, skills, sections FROM candidates WHERE id > ? ORDER BY id', (last_id,)
+            ).fetchall()
+        return [(row_id, filename, json.loads(skills), json.loads(sections))
+                for row_id, filename, skills, sections in rows]
+
+
+class CandidateMatrix:
+    """Candidates x skills 0/1 matrix mirrored from a CandidateStore.
+
+    ``refresh()`` only loads rows added since the last call and rebuilds from
+    scratch when a different SkillIndex (i.e. taxonomy) is passed in.
+    """
+
+    def __init__(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.filenames = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self._skill_index = None
+        self._lock = threading.Lock()
+
+    def refresh(self, store, skill_index):
+        """Syncs with ``store`` and returns an ``(ids, filenames, matrix)`` snapshot."""
+        with self._lock:
+            if skill_index is not self._skill_index:
+                self.ids = np.zeros(0, dtype=np.int64)
+                self.filenames = []
+                self.matrix = np.zeros((0, len(skill_index)), dtype=np.float32)
+                self._skill_index = skill_index
+            last_id = int(self.ids[-1]) if len(self.ids) else 0
+            rows = store.since(last_id)
+            if rows:
+                block = np.zeros((len(rows), len(skill_index)), dtype=np.float32)
+                for i, (_, _, skills, _) in enumerate(rows):
+                    columns = [skill_index.ids[s] for s in skills if s in skill_index.ids]
+                    block[i, columns] = 1.0
+                self.ids = np.concatenate([self.ids, np.array([r[0] for r in rows], dtype=np.int64)])
+                self.filenames = self.filenames + [r[1] for r in rows]
+                self.matrix = np.vstack([self.matrix, block])
+            return self.ids, self.filenames, self.matrix
+
+
+class CandidateIndex:
+    """Inverted index from search terms to the candidates holding them.
+
+    Terms are skill names plus ``section:<name>`` for every resume section
+    found. Each posting list is an int bitset over row positions (rows are
+    in candidate id order), so boolean queries are a few bitwise ops.
+    """
+
+    def __init__(self):
+        self.rows = []  # (id, filename, skills, sections)
+        self.postings = {}
+        self._lock = threading.Lock()
+
+    def refresh(self, store):
+        """Indexes candidates added to ``store`` since the last call."""
+        with self._lock:
+            last_id = self.rows[-1][0] if self.rows else 0
+            for row in store.since(last_id):
+                bit = 1 << len(self.rows)
+                self.rows.append(row)
+                _, _, skills, sections = row
+                for term in skills + ['section:' + name for name in sections]:
+                    self.postings[term] = self.postings.get(term, 0) | bit
+
+    def _evaluate(self, node, universe):
+        op = node[0]
+        if op == 'term':
+            return self.postings.get(node[1], 0)
+        if op == 'not':
+            return universe & ~self._evaluate(node[1], universe)
+        left, right = self._evaluate(node[1], universe), self._evaluate(node[2], universe)
+        return left & right if op == 'and' else left | right
+
+    def search(self, query, offset=0, limit=20):
+        """Runs a parse_query() tree; returns ``(total, rows)`` for one page in id order."""
+        with self._lock:
+            universe = (1 << len(self.rows)) - 1
+            hits = self._evaluate(query, universe)
+            total = bin(hits).count('1')
+            page = []
+            position = 0
+            while hits and len(page) < limit:
+                lowest = hits & -hits
+                if position >= offset:
+                    page.append(self.rows[lowest.bit_length() - 1])
+                position += 1
+                hits ^= lowest
+            return total, page
+
+
+_QUERY_TOKEN_RE = re.compile(r'\(|\)|,|"[^"]*"|[^\s(),"]+')
+_OPERATORS = {'and': 'AND', 'or': 'OR', 'not': 'NOT', ',': 'AND', '(': '(', ')': ')'}
+
+
+def parse_query(query, normalize=str.lower):
+    """Parses a boolean skill query into a tree for CandidateIndex.search().
+
+    Supports ``AND`` (also ``,`` or plain juxtaposition of groups), ``OR``,
+    ``NOT`` and parentheses, e.g. ``react native AND firebase, NOT php``.
+    Adjacent words form one multi-word term; quote a term to keep operator
+    words inside it. Terms go through ``normalize`` except ``section:``
+    terms, which are lowercased with spaces as underscores. Raises
+    ValueError on a malformed query.
+    """
+    tokens = []
+    words = []
+
+    def flush():
+        if words:
+            term = ' '.join(words)
+            if term.lower().startswith('section:'):
+                term = 'section:' + '_'.join(term[8:].lower().split())
+            else:
+                term = normalize(term)
+            tokens.append(('TERM', term))
+            words.clear()
+
+    for raw in _QUERY_TOKEN_RE.findall(query):
+        operator = _OPERATORS.get(raw.lower())
+        if operator:
+            flush()
+            tokens.append((operator, raw))
+        elif raw.startswith('"'):
+            flush()
+            words.append(raw.strip('"'))
+            flush()
+        else:
+            words.append(raw)
+    flush()
+    if not tokens:
+        raise ValueError('Empty search query')
+
+    position = 0
+
+    def peek():
+        return tokens[position][0] if position < len(tokens) else None
+
+    def take(kind):
+        nonlocal position
+        if peek() != kind:
+            found = tokens[position][1] if position < len(tokens) else 'end of query'
+            raise ValueError(f"Unexpected {found!r} in search query")
+        position += 1
+        return tokens[position - 1][1]
+
+    def parse_or():
+        node = parse_and()
+        while peek() == 'OR':
+            take('OR')
+            node = ('or', node, parse_and())
+        return node
+
+    def parse_and():
+        node = parse_not()
+        while peek() in ('AND', 'NOT', '(', 'TERM'):
+            if peek() == 'AND':
+                take('AND')
+            node = ('and', node, parse_not())
+        return node
+
+    def parse_not():
+        if peek() == 'NOT':
+            take('NOT')
+            return ('not', parse_not())
+        if peek() == '(':
+            take('(')
+            node = parse_or()
+            take(')')
+            return node
+        term = take('TERM')
+        if not term:
+            raise ValueError('Empty term in search query')
+        return ('term', term)
+
+    tree = parse_or()
+    if position != len(tokens):
+        take(None)
+    return tree
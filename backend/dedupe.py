@@ -0,0 +1,153 @@
+"""Near-duplicate text detection with MinHash signatures and an LSH index.
+
+A signature summarizes the set of word shingles in a text; the fraction of
+positions two signatures agree on estimates the Jaccard similarity of the
+two shingle sets. Re-exported PDFs or a changed phone number only touch a
+few shingles, so such copies stay well above the threshold while byte
+hashes of the files differ completely.
+"""
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+_WORD_RE = re.compile(r'\w+')
+_MASK32 = np.uint64(0xFFFFFFFF)
+_SHINGLE_BASE = np.uint64(0x01000193)  # FNV prime; any odd multiplier works
+_BLOCK = 4096  # shingles hashed per step, bounding the (num_perm x block) temporary
+
+
+def _token_hashes(text):
+    """32-bit hashes of the lowercased word tokens of ``text``, as uint64."""
+    tokens = _WORD_RE.findall(text.lower())
+    if not tokens:
+        return np.zeros(0, dtype=np.uint64)
+    vocabulary, inverse = np.unique(np.array(tokens), return_inverse=True)
+    # Per-token hashes must not depend on the process, so no built-in hash()
+    hashed = np.array([_fnv1a(word) for word in vocabulary.tolist()], dtype=np.uint64)
+    return hashed[inverse]
+
+
+def _fnv1a(word):
+    h = 0x811C9DC5
+    for byte in word.encode('utf-8'):
+        h = ((h ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return h
+
+
+class MinHasher:
+    """Computes ``num_perm``-slot MinHash signatures over ``shingle_size``-word shingles.
+
+    Signatures from hashers with the same parameters and ``seed`` are
+    comparable, across processes too.
+    """
+
+    def __init__(self, num_perm=128, shingle_size=5, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # Multiply-add-shift hashing: the top 32 bits of (a * x + b) mod 2**64
+        # for random 64-bit a (odd) and b; uint64 arithmetic wraps as needed.
+        top = np.iinfo(np.uint64).max
+        self._a = (rng.integers(0, top, num_perm, dtype=np.uint64, endpoint=True) | np.uint64(1))[:, None]
+        self._b = rng.integers(0, top, num_perm, dtype=np.uint64, endpoint=True)[:, None]
+
+    def shingles(self, text):
+        """Distinct hashes of every run of ``shingle_size`` consecutive words."""
+        tokens = _token_hashes(text)
+        k = self.shingle_size
+        if len(tokens) < k:
+            return np.zeros(0, dtype=np.uint64)
+        shingles = np.zeros(len(tokens) - k + 1, dtype=np.uint64)
+        for i in range(k):
+            shingles = (shingles * _SHINGLE_BASE + tokens[i:len(tokens) - k + 1 + i]) & _MASK32
+        return np.unique(shingles)
+
+    def signature(self, text):
+        """The MinHash signature of ``text`` as a uint32 array, or None if it is too short to have one."""
+        shingles = self.shingles(text)
+        if not len(shingles):
+            return None
+        signature = np.full(self.num_perm, 0xFFFFFFFF, dtype=np.uint64)
+        for start in range(0, len(shingles), _BLOCK):
+            block = shingles[None, start:start + _BLOCK]
+            np.minimum(signature, ((self._a * block + self._b) >> np.uint64(32)).min(axis=1), out=signature)
+        return signature.astype(np.uint32)
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return float(np.count_nonzero(signature == other)) / len(signature)
+
+
+class LSHIndex:
+    """Banded LSH over MinHash signatures, bounded to the newest ``max_entries`` items.
+
+    Signatures are cut into ``bands`` bands; two items become candidates when
+    any band matches exactly, and candidates are then checked against the
+    similarity threshold. With 128 slots, 16 bands of 8 rows make pairs at
+    0.9 similarity collide almost surely while pairs below ~0.5 rarely do.
+    ``context`` keeps items apart that must never be matched with each
+    other (e.g. results from different taxonomy versions).
+    """
+
+    def __init__(self, num_perm=128, bands=16, max_entries=10000):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        self._items = OrderedDict()  # key -> (context, signature, value)
+        self._buckets = {}  # (context, band, band bytes) -> set of keys
+        self._next_key = 0
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.duplicates = 0
+
+    def _band_keys(self, signature, context):
+        rows = self.rows
+        return [(context, band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self.bands)]
+
+    def add(self, signature, value, context=None):
+        """Indexes ``value`` under ``signature``; the oldest item is dropped when full."""
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+            self._items[key] = (context, signature, value)
+            for band_key in self._band_keys(signature, context):
+                self._buckets.setdefault(band_key, set()).add(key)
+            while len(self._items) > self.max_entries:
+                self._remove(next(iter(self._items)))
+            return key
+
+    def _remove(self, key):
+        context, signature, _ = self._items.pop(key)
+        for band_key in self._band_keys(signature, context):
+            bucket = self._buckets[band_key]
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[band_key]
+
+    def query(self, signature, threshold, context=None):
+        """The ``(value, similarity)`` of the most similar item at or above ``threshold``, else None."""
+        with self._lock:
+            self.queries += 1
+            candidates = set()
+            for band_key in self._band_keys(signature, context):
+                candidates.update(self._buckets.get(band_key, ()))
+            best = None
+            # Lowest key first, so ties go to the item indexed earliest
+            for key in sorted(candidates):
+                score = similarity(signature, self._items[key][1])
+                if score >= threshold and (best is None or score > best[1]):
+                    best = (self._items[key][2], score)
+            if best is not None:
+                self.duplicates += 1
+            return best
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self):
+        return {'entries': len(self._items), 'queries': self.queries, 'duplicates': self.duplicates}
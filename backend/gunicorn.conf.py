@@ -0,0 +1,15 @@
+"""Gunicorn settings for the ATS backend.
+
+The app is imported once in the master (preload_app) with PRELOAD_MODEL=1,
+so the spaCy model is loaded and warmed before workers fork and its memory
+is shared copy-on-write instead of being loaded N times.
+"""
+import os
+
+os.environ.setdefault('PRELOAD_MODEL', '1')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = True
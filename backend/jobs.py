@@ -0,0 +1,83 @@
+"""SQLite-backed store for asynchronous analysis jobs.
+
+The database file is shared by every gunicorn worker and pool process, so a
+job submitted to one worker can be polled through any other. Rows expire
+``ttl`` seconds after they were last updated.
+"""
+import json
+import time
+import uuid
+
+from sqlite_store import SQLiteStore
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class JobStore(SQLiteStore):
+    """Tracks job status and results; safe to share across threads and processes."""
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS jobs ('
+        'id TEXT PRIMARY KEY, status TEXT NOT NULL, result TEXT, error TEXT, '
+        'created REAL NOT NULL, updated REAL NOT NULL, expires REAL NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS jobs_expires ON jobs (expires)',
+    )
+
+    def __init__(self, path, ttl):
+        super().__init__(path)
+        self.ttl = ttl
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(sql, params).fetchall()
+            conn.commit()
+            return rows
+
+    def create(self):
+        """Registers a new queued job and returns its id."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._execute(
+            'INSERT INTO jobs (id, status, created, updated, expires) VALUES (?, ?, ?, ?, ?)',
+            (job_id, QUEUED, now, now, now + self.ttl)
+        )
+        return job_id
+
+    def _update(self, job_id, status, result=None, error=None):
+        now = time.time()
+        self._execute(
+            'UPDATE jobs SET status = ?, result = ?, error = ?, updated = ?, expires = ? WHERE id = ?',
+            (status, json.dumps(result) if result is not None else None, error, now, now + self.ttl, job_id)
+        )
+
+    def start(self, job_id):
+        self._update(job_id, RUNNING)
+
+    def finish(self, job_id, result):
+        self._update(job_id, DONE, result=result)
+
+    def fail(self, job_id, error):
+        self._update(job_id, FAILED, error=error)
+
+    def get(self, job_id):
+        """Returns the job as a dict, or None if it is unknown or expired."""
+        rows = self._execute(
+            'SELECT id, status, result, error, created, updated FROM jobs WHERE id = ? AND expires > ?',
+            (job_id, time.time())
+        )
+        if not rows:
+            return None
+        job_id, status, result, error, created, updated = rows[0]
+        job = {'job_id': job_id, 'status': status, 'created': created, 'updated': updated}
+        if result is not None:
+            job['result'] = json.loads(result)
+        if error is not None:
+            job['error'] = error
+        return job
+
+    def purge_expired(self):
+        self._execute('DELETE FROM jobs WHERE expires <= ?', (time.time(),))
@@ -0,0 +1,77 @@
+"""Opt-in cProfile capture of individual requests.
+
+Dumps are standard pstats files: load them with ``pstats.Stats(path)`` or
+feed them to snakeviz / flameprof for a flame graph.
+"""
+import cProfile
+import os
+import random
+import threading
+import time
+
+
+class RequestProfiler:
+    """Rate-limits profiled requests and writes one ``.prof`` dump per request.
+
+    Of the requests that ask for profiling, only a ``sample_rate`` fraction
+    is profiled, at most one at a time and at most one per ``min_interval``
+    seconds. Only the newest ``max_files`` dumps are kept in ``directory``.
+    """
+
+    def __init__(self, directory, sample_rate=1.0, min_interval=10.0, max_files=50):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.min_interval = min_interval
+        self.max_files = max_files
+        self.profiled = 0
+        self.skipped = 0
+        self._last_started = None
+        self._active = False
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """True if the caller may profile now; pair with release()."""
+        with self._lock:
+            now = time.monotonic()
+            if (self._active or random.random() >= self.sample_rate or
+                    (self._last_started is not None and now - self._last_started < self.min_interval)):
+                self.skipped += 1
+                return False
+            self._active = True
+            self._last_started = now
+            self.profiled += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._active = False
+
+    def run(self, label, fn, *args, **kwargs):
+        """Calls ``fn`` under cProfile; returns ``(result, dump file name)``."""
+        profiler = cProfile.Profile()
+        try:
+            result = profiler.runcall(fn, *args, **kwargs)
+        finally:
+            name = self.dump(profiler, label)
+        return result, name
+
+    def dump(self, profiler, label):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{label}-{os.getpid()}.prof"
+        profiler.dump_stats(os.path.join(self.directory, name))
+        self._prune()
+        return name
+
+    def _prune(self):
+        dumps = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith('.prof')),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in dumps[:max(len(dumps) - self.max_files, 0)]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def stats(self):
+        return {'profiled': self.profiled, 'skipped': self.skipped, 'directory': self.directory}
@@ -5,3 +5,6 @@ pip --default-timeout=300 install -r requirements.txt
 
 # install spaCy model wheel that matches spacy version in requirements.txt
 pip --default-timeout=300 install https://github.com/explosion/spacy-models/releases/download/en_core_web_sm-3.6.0/en_core_web_sm-3.6.0-py3-none-any.whl
+
+# compile the skill taxonomy so workers don't rebuild it at start-up
+python taxonomy.py
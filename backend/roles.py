@@ -0,0 +1,79 @@
+"""Registered job descriptions ("roles") with their skills precomputed.
+
+Skill extraction runs once, when a role is registered; matching a resume
+against every role afterwards only needs set operations. Rows remember the
+taxonomy version they were analyzed under so stale ones can be redone.
+"""
+import json
+import threading
+import time
+
+from sqlite_store import SQLiteStore
+
+
+class RoleStore(SQLiteStore):
+    """SQLite table of registered roles, shared by all workers on the host."""
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS roles ('
+        'id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, '
+        'job_description TEXT NOT NULL, required_skills TEXT NOT NULL, '
+        'mentions_communication INTEGER NOT NULL, taxonomy_version TEXT NOT NULL, '
+        'created REAL NOT NULL)',
+    )
+
+    def add(self, title, job_description, required_skills, mentions_communication, taxonomy_version):
+        """Stores one analyzed role and returns its id."""
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(
+                'INSERT INTO roles (title, job_description, required_skills, mentions_communication, '
+                'taxonomy_version, created) VALUES (?, ?, ?, ?, ?, ?)',
+                (title, job_description, json.dumps(sorted(required_skills)), int(mentions_communication),
+                 taxonomy_version, time.time())
+            )
+            conn.commit()
+            return cursor.lastrowid
+
+    def since(self, last_id):
+        """Returns role dicts with an id above ``last_id``, in id order."""
+        with self._lock:
+            rows = self._connection().execute(
+                'SELECT id, title, job_description, required_skills, mentions_communication, taxonomy_version '
+                'FROM roles WHERE id > ? ORDER BY id', (last_id,)
+            ).fetchall()
+        return [{
+            'role_id': role_id,
+            'title': title,
+            'job_description': job_description,
+            'required_skills': json.loads(required_skills),
+            'mentions_communication': bool(mentions_communication),
+            'taxonomy_version': taxonomy_version,
+        } for role_id, title, job_description, required_skills, mentions_communication, taxonomy_version in rows]
+
+
+class RoleRegistry:
+    """In-memory mirror of a RoleStore with each role prepared for matching.
+
+    ``prepare(role)`` turns a stored role into whatever the matcher needs
+    (in app.py, an analyze_job_description()-shaped dict). Everything is
+    prepared again when ``version`` changes.
+    """
+
+    def __init__(self, prepare):
+        self.prepare = prepare
+        self.roles = []
+        self._version = None
+        self._lock = threading.Lock()
+
+    def refresh(self, store, version):
+        """Syncs with ``store`` and returns the list of ``(role, prepared)`` pairs."""
+        with self._lock:
+            if version != self._version:
+                self.roles = []
+                self._version = version
+            last_id = self.roles[-1][0]['role_id'] if self.roles else 0
+            added = [(role, self.prepare(role)) for role in store.since(last_id)]
+            if added:
+                self.roles = self.roles + added
+            return self.roles
@@ -0,0 +1,120 @@
+"""Aho-Corasick keyword automaton used by the "fast" skill extraction engine.
+
+All taxonomy phrases are compiled into one automaton so a text is scanned in
+a single linear pass, independent of how many skills the taxonomy holds.
+"""
+from collections import deque
+
+# A "." between word characters never splits a token ("node.js" is not "js").
+_INFIX = '.'
+# Neighbours that additionally keep a whole-word skill glued to a longer
+# token, e.g. the "c" in "c++"/"c#".
+_JOINERS = '+#'
+# Infixes spaCy's English tokenizer splits on only in some contexts.
+_SOMETIMES_INFIX = '/-'
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == '_'
+
+
+def _splits(left, infix, right):
+    """True if spaCy's English tokenizer splits ``left + infix + right`` at the infix.
+
+    "html/css" and "sql-based" are three tokens each, but "a/1" and
+    "mysql-8" stay single tokens.
+    """
+    if infix == '-':
+        return left.isalpha() and right.isalpha()
+    return left.isalnum() and right.isalpha()
+
+
+class SkillAutomaton:
+    """Multi-pattern matcher mapping every matched phrase to an output value.
+
+    ``terms`` maps phrase -> value (for skills, the normalized skill name).
+    With ``word_boundaries`` a match must not touch a letter or digit on
+    either side, nor be joined to one by an infix ``.``, which mirrors spaCy's
+    token-level Matcher. Phrases listed in ``whole_word`` are stricter still:
+    they are also rejected when joined to the surrounding text by ``+``/``#``,
+    or by a ``/`` or ``-`` that spaCy would not split on (see _splits()).
+    Without ``word_boundaries`` every substring occurrence counts.
+    """
+
+    def __init__(self, terms, whole_word=(), word_boundaries=True):
+        self.word_boundaries = word_boundaries
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._terms = []  # (length, value, strict)
+        whole_word = set(whole_word)
+        for phrase, value in terms.items():
+            if phrase:
+                self._add(phrase, value, phrase in whole_word)
+        self._link()
+
+    def _add(self, phrase, value, strict):
+        state = 0
+        for ch in phrase:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(len(self._terms))
+        self._terms.append((len(phrase), value, strict))
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _bounded(self, text, start, end, strict):
+        before = text[start - 1] if start > 0 else ''
+        after = text[end] if end < len(text) else ''
+        if (before and _is_word_char(before)) or (after and _is_word_char(after)):
+            return False
+        if before and before in _INFIX and start > 1 and _is_word_char(text[start - 2]):
+            return False
+        if after and after in _INFIX and end + 1 < len(text) and _is_word_char(text[end + 1]):
+            return False
+        if not strict:
+            return True
+        if (before and before in _JOINERS) or (after and after in _JOINERS):
+            return False
+        if (before and before in _SOMETIMES_INFIX and start > 1 and _is_word_char(text[start - 2])
+                and not _splits(text[start - 2], before, text[start])):
+            return False
+        if (after and after in _SOMETIMES_INFIX and end + 1 < len(text) and _is_word_char(text[end + 1])
+                and not _splits(text[end - 1], after, text[end + 1])):
+            return False
+        return True
+
+    def finditer(self, text):
+        """Yields ``(start, end, value)`` for every (possibly overlapping) match."""
+        goto, fail, out, terms = self._goto, self._fail, self._out, self._terms
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for term_id in out[state]:
+                length, value, strict = terms[term_id]
+                start = i + 1 - length
+                if not self.word_boundaries or self._bounded(text, start, i + 1, strict):
+                    yield start, i + 1, value
+
+    def findall(self, text):
+        """Returns the set of values of all phrases found in ``text``."""
+        return {value for _, _, value in self.finditer(text)}
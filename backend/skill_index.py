@@ -0,0 +1,58 @@
+"""Integer interning of the skill taxonomy and bitset skill profiles.
+
+Every taxonomy skill gets a small integer id (assigned in sorted order) and a
+skill profile is a Python int with bit ``id`` set for each skill it holds.
+Set algebra becomes bitwise ops, counting becomes a popcount, and because ids
+follow alphabetical order, decoding a bitset already yields a sorted list.
+"""
+
+
+try:
+    popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+    def popcount(bits):
+        """Number of skills in a bitset."""
+        return bin(bits).count('1')
+
+
+class SkillIndex:
+    """Id tables and masks for one version of the skill taxonomy."""
+
+    def __init__(self, common_skills, hard_skills, skill_groups):
+        vocabulary = set(common_skills) | set(hard_skills)
+        for members in skill_groups.values():
+            vocabulary |= set(members)
+        self.skills = tuple(sorted(vocabulary))
+        self.ids = {skill: skill_id for skill_id, skill in enumerate(self.skills)}
+        self.common_mask = self.to_bits(common_skills)
+        self.hard_mask = self.to_bits(hard_skills)
+
+    def __len__(self):
+        return len(self.skills)
+
+    def bit(self, skill):
+        """Bitset holding just ``skill`` (0 if it is not in the taxonomy)."""
+        skill_id = self.ids.get(skill)
+        return 0 if skill_id is None else 1 << skill_id
+
+    def to_bits(self, skills):
+        """Encodes an iterable of skill names; names outside the taxonomy are dropped."""
+        bits = 0
+        ids = self.ids
+        for skill in skills:
+            skill_id = ids.get(skill)
+            if skill_id is not None:
+                bits |= 1 << skill_id
+        return bits
+
+    def iter_ids(self, bits):
+        """Yields the ids of the set bits in ascending order."""
+        while bits:
+            lowest = bits & -bits
+            yield lowest.bit_length() - 1
+            bits ^= lowest
+
+    def to_skills(self, bits):
+        """Decodes a bitset into a sorted list of skill names."""
+        skills = self.skills
+        return [skills[skill_id] for skill_id in self.iter_ids(bits)]
@@ -0,0 +1,42 @@
+"""Connection handling shared by the SQLite-backed stores."""
+import os
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """Base for stores kept in one SQLite file shared by every process on the host.
+
+    Subclasses list their ``CREATE ... IF NOT EXISTS`` statements in
+    ``SCHEMA`` and override ``_migrate()`` for changes those cannot make
+    (e.g. a column added later). Hold ``_lock`` while using the connection.
+    """
+
+    SCHEMA = ()
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._conn_pid = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        # Connections must not cross a fork, so reopen in each process.
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            self._migrate(conn)
+            conn.commit()
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    def _migrate(self, conn):
+        pass
+
+    @staticmethod
+    def _add_column(conn, table, column, definition):
+        """Adds ``column`` to ``table`` unless a database created by an older version already has it."""
+        if column not in {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
@@ -0,0 +1,262 @@
+"""Skill taxonomy: data file, compiled artifact and live hot-swapping.
+
+The taxonomy is defined in taxonomy.json:
+
+``common_skills``      skills a resume or JD is scored on
+``skill_mapping``      surface form -> normalized skill
+``hard_skills``        skills that drive the overall score when a JD has any
+``skill_groups``       group name -> member skills
+``whole_word_skills``  skills that must not be glued to neighbouring tokens
+``patterns``           spaCy Matcher patterns; a plain string token stands for
+                       ``{"LOWER": token}``
+
+Compiling it builds everything the analysis needs (normalization map,
+SkillIndex id tables, the fast-engine and tech-stack automatons) and
+``python taxonomy.py`` pickles the result into an artifact workers load
+without recompiling. The version is a content hash of the data, so caches
+keyed on it never serve results computed under a different taxonomy.
+
+Artifacts are pickles: only load files built by this script.
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+
+from skill_automaton import SkillAutomaton
+from skill_index import SkillIndex
+
+ARTIFACT_FORMAT = 1
+SOURCE_KEYS = ('common_skills', 'skill_mapping', 'hard_skills', 'skill_groups', 'whole_word_skills', 'patterns')
+
+
+def _pattern_phrase(pattern):
+    """Turns a token pattern into the surface text it matches ('-' tokens are glued)."""
+    phrase = ""
+    for token in pattern:
+        word = token['LOWER']
+        if phrase and word != '-' and not phrase.endswith('-'):
+            phrase += " "
+        phrase += word
+    return phrase
+
+
+class Taxonomy:
+    """One compiled, immutable version of the skill taxonomy."""
+
+    def __init__(self, source):
+        missing = [key for key in SOURCE_KEYS if key not in source]
+        if missing:
+            raise ValueError(f"Taxonomy source is missing: {', '.join(missing)}")
+        self.common_skills = frozenset(source['common_skills'])
+        self.skill_mapping = dict(source['skill_mapping'])
+        self.hard_skills = frozenset(source['hard_skills'])
+        self.skill_groups = {group: frozenset(members) for group, members in source['skill_groups'].items()}
+        self.whole_word_skills = frozenset(source['whole_word_skills'])
+        self.patterns = [[token if isinstance(token, dict) else {'LOWER': token} for token in pattern]
+                         for pattern in source['patterns']]
+        self.version = self._content_version()
+
+        # Integer ids for every taxonomy skill; skill sets in scoring are int bitsets.
+        self.index = SkillIndex(self.common_skills, self.hard_skills, self.skill_groups)
+        # Single-character phrases outside whole_word_skills are dropped up
+        # front, matching the filter applied to spaCy's output.
+        phrases = (set(self.common_skills) | set(self.skill_mapping) |
+                   {_pattern_phrase(pattern) for pattern in self.patterns if all('LOWER' in t for t in pattern)})
+        self.skill_automaton = SkillAutomaton(
+            {phrase: self.normalize(phrase) for phrase in phrases
+             if len(phrase) > 1 or phrase in self.whole_word_skills},
+            whole_word=self.whole_word_skills,
+        )
+        # Substring lookup of every common skill inside project lines
+        self.tech_stack_automaton = SkillAutomaton({skill: skill for skill in sorted(self.common_skills)},
+                                                   word_boundaries=False)
+        self._init_runtime()
+
+    def _init_runtime(self):
+        self._bits = {}
+        self._matcher = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for key in ('_bits', '_matcher', '_lock'):
+            del state[key]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_runtime()
+
+    def _content_version(self):
+        payload = json.dumps([
+            sorted(self.common_skills), self.skill_mapping, sorted(self.hard_skills),
+            {group: sorted(members) for group, members in self.skill_groups.items()},
+            sorted(self.whole_word_skills), self.patterns,
+        ], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+
+    def normalize(self, skill):
+        """Normalizes a skill name to its canonical form."""
+        skill = skill.lower().strip()
+        return self.skill_mapping.get(skill, skill)
+
+    def bits(self, *skills):
+        """Memoized ``index.to_bits(skills)`` for fixed skill lists used in scoring rules."""
+        bits = self._bits.get(skills)
+        if bits is None:
+            bits = self._bits[skills] = self.index.to_bits(skills)
+        return bits
+
+    def matcher(self, vocab):
+        """The spaCy Matcher for ``patterns``, built on first use for ``vocab``."""
+        matcher = self._matcher
+        if matcher is None or matcher.vocab is not vocab:
+            with self._lock:
+                matcher = self._matcher
+                if matcher is None or matcher.vocab is not vocab:
+                    from spacy.matcher import Matcher
+                    matcher = Matcher(vocab)
+                    matcher.add("SKILL_PATTERN", self.patterns, on_match=None)
+                    self._matcher = matcher
+        return matcher
+
+    def check(self):
+        """Lists inconsistencies between the taxonomy's lists (not fatal, but usually drift)."""
+        problems = []
+        for source, target in self.skill_mapping.items():
+            if source in self.common_skills and target not in self.common_skills:
+                problems.append(f"'{source}' is a common skill but normalizes to '{target}', which is not")
+        for skill in sorted(self.hard_skills - {self.normalize(s) for s in self.common_skills}):
+            problems.append(f"hard skill '{skill}' can never be matched: no common skill normalizes to it")
+        return problems
+
+
+def load_source(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def build_artifact(source_path, artifact_path):
+    """Compiles ``source_path`` and atomically replaces ``artifact_path``; returns the Taxonomy."""
+    taxonomy = Taxonomy(load_source(source_path))
+    payload = {
+        'format': ARTIFACT_FORMAT,
+        'version': taxonomy.version,
+        'source_sha256': _file_digest(source_path),
+        'taxonomy': taxonomy,
+    }
+    directory = os.path.dirname(os.path.abspath(artifact_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.taxonomy-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, artifact_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return taxonomy
+
+
+def load_artifact(path):
+    """Returns ``(taxonomy, source_sha256)`` from an artifact written by build_artifact()."""
+    with open(path, 'rb') as f:
+        payload = pickle.load(f)
+    if payload.get('format') != ARTIFACT_FORMAT:
+        raise ValueError(f"Unsupported taxonomy artifact format {payload.get('format')!r}")
+    return payload['taxonomy'], payload['source_sha256']
+
+
+class TaxonomyLoader:
+    """Holds the live Taxonomy and swaps in a new artifact when its file changes.
+
+    At start-up the artifact is used if it was built from the current source
+    file; otherwise (or if there is none) the source is compiled in-process.
+    refresh() re-checks the artifact at most every ``check_interval``
+    seconds and replaces ``current`` in a single assignment, so readers see
+    either the old or the new taxonomy, never a mix.
+    """
+
+    def __init__(self, artifact_path, source_path, check_interval=5.0):
+        self.artifact_path = artifact_path
+        self.source_path = source_path
+        self.check_interval = check_interval
+        self.origin = None
+        self.loaded_at = None
+        self.swaps = 0
+        self._artifact_stat = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.current = self._initial()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.artifact_path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _initial(self):
+        self._artifact_stat = self._stat()
+        if self._artifact_stat is not None:
+            taxonomy, source_sha256 = load_artifact(self.artifact_path)
+            if not os.path.exists(self.source_path) or source_sha256 == _file_digest(self.source_path):
+                self.origin, self.loaded_at = 'artifact', time.time()
+                return taxonomy
+        self.origin, self.loaded_at = 'source', time.time()
+        return Taxonomy(load_source(self.source_path))
+
+    def refresh(self):
+        """Swaps in a rebuilt artifact if one appeared; returns the live Taxonomy."""
+        now = time.monotonic()
+        if now < self._next_check:
+            return self.current
+        with self._lock:
+            if now < self._next_check:
+                return self.current
+            self._next_check = now + self.check_interval
+            stat = self._stat()
+            if stat is not None and stat != self._artifact_stat:
+                self._artifact_stat = stat
+                taxonomy, _ = load_artifact(self.artifact_path)
+                if taxonomy.version != self.current.version:
+                    self.current = taxonomy
+                    self.origin, self.loaded_at = 'artifact', time.time()
+                    self.swaps += 1
+        return self.current
+
+    def stats(self):
+        return {'version': self.current.version, 'origin': self.origin,
+                'loaded_at': self.loaded_at, 'swaps': self.swaps}
+
+
+def main(argv=None):
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Compile taxonomy.json into a taxonomy artifact.")
+    parser.add_argument('--source', default=os.path.join(here, 'taxonomy.json'))
+    parser.add_argument('--output', default=os.path.join(here, 'taxonomy.pkl'))
+    parser.add_argument('--strict', action='store_true', help='fail if check() reports problems')
+    args = parser.parse_args(argv)
+
+    problems = Taxonomy(load_source(args.source)).check()
+    for problem in problems:
+        print(f"warning: {problem}")
+    if problems and args.strict:
+        return 1
+    taxonomy = build_artifact(args.source, args.output)
+    print(f"Wrote taxonomy {taxonomy.version} ({len(taxonomy.index)} skills) to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""Chunked NLP input: split_into_chunks(), PageChunks, clip_text() and the page budget."""
+import io
+import random
+
+import PyPDF2
+
+import pytest
+
+import app
+
+WORDS = ['python', 'react native', 'sql', 'the', 'and', 'amazon web services', 'a', 'machine learning', 'node.js']
+
+
+def random_text(rng, n_words):
+    """Text of numbered words, so every chunk occurs exactly once in it."""
+    pieces = []
+    for i in range(n_words):
+        pieces.append(f'{rng.choice(WORDS)}{i}')
+        pieces.append(rng.choice([' ', ' ', ' ', '\n', '\n\n']))
+    return ''.join(pieces)
+
+
+def chunk_offsets(text, chunks):
+    """Start offset of each chunk in ``text``, checking they tile it in order."""
+    offsets, position = [], 0
+    for chunk in chunks:
+        start = text.index(chunk)
+        assert text[start:start + len(chunk)] == chunk
+        assert start <= position  # no gap after the previous chunk
+        offsets.append(start)
+        position = start + len(chunk)
+    assert position == len(text)
+    return offsets
+
+
+@pytest.mark.parametrize('seed', range(50))
+@pytest.mark.parametrize('max_chars,overlap', [(40, 10), (120, 30), (500, 60)])
+def test_chunks_cover_text_with_overlap(seed, max_chars, overlap):
+    rng = random.Random(seed)
+    text = random_text(rng, 300)
+    chunks = app.split_into_chunks(text, max_chars, overlap)
+    assert all(len(chunk) <= max_chars for chunk in chunks)
+    offsets = chunk_offsets(text, chunks)
+    for start in offsets[1:]:
+        assert text[start - 1].isspace()  # chunks start on a word
+    # Any phrase of up to `overlap` characters that starts on a word is whole in some chunk
+    ends = [start + len(chunk) for start, chunk in zip(offsets, chunks)]
+    for start in (i for i in range(1, len(text)) if text[i - 1].isspace() and not text[i].isspace()):
+        end = start + overlap
+        assert any(s <= start and end <= e or e == len(text) and s <= start for s, e in zip(offsets, ends))
+
+
+def test_prefers_paragraph_then_line_breaks():
+    text = 'a' * 30 + '\n\n' + 'b' * 10 + '\n' + 'c' * 10
+    assert app.split_into_chunks(text, 50, 0)[0] == 'a' * 30 + '\n\n'
+    assert app.split_into_chunks(text.replace('\n\n', ' '), 50, 0)[0] == 'a' * 30 + ' ' + 'b' * 10 + '\n'
+
+
+def test_hard_cut_without_breaks():
+    assert app.split_into_chunks('x' * 25, 10, 3) == ['x' * 10, 'x' * 10, 'x' * 5]
+
+
+def test_short_text_is_one_chunk():
+    assert app.split_into_chunks('python and sql', 100, 20) == ['python and sql']
+
+
+def test_skill_across_a_cut_is_found(monkeypatch):
+    text = 'filler ' * 9 + 'amazon web services\n' + 'more text ' * 5
+    monkeypatch.setitem(app.app.config, 'NLP_CHUNK_CHARS', 0)
+    whole = app.extract_skills_with_ner_and_patterns(text)
+    for chunk_chars in (60, 70, 80):
+        monkeypatch.setitem(app.app.config, 'NLP_CHUNK_CHARS', chunk_chars)
+        monkeypatch.setitem(app.app.config, 'NLP_CHUNK_OVERLAP', 25)
+        assert app.extract_skills_with_ner_and_patterns(text) == whole
+        assert list(app.extract_skills_batch([text, 'python'])) == [whole, app.extract_skills('python', 'spacy')]
+
+
+def random_pages(rng, text):
+    """``text`` cut into pages of random length, some of them empty."""
+    cuts = sorted(rng.sample(range(len(text)), rng.randint(0, 12)))
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])] + [''] * rng.randint(0, 1)
+
+
+@pytest.mark.parametrize('seed', range(100))
+@pytest.mark.parametrize('max_chars,overlap', [(40, 10), (120, 30), (5000, 60)])
+def test_page_chunks_match_split_into_chunks(seed, max_chars, overlap):
+    rng = random.Random(seed)
+    text = random_text(rng, rng.randint(0, 400)).title()
+    pages = random_pages(rng, text)
+    max_text_chars = rng.choice([0, 300, 1000, 100000])
+    chunks = app.PageChunks(iter(pages), max_chars, overlap, max_text_chars)
+    expected = app.split_into_chunks(app.clip_text(text, max_text_chars)[0].lower(), max_chars, overlap)
+    assert list(chunks) == expected
+    assert chunks.text == text
+
+
+def test_page_chunks_start_before_the_last_page():
+    pages = [f'python developer {i}\n' * 20 for i in range(10)]
+    read = []
+
+    def reading():
+        for page in pages:
+            read.append(page)
+            yield page
+
+    for chunk in app.PageChunks(reading(), 100, 20):
+        assert len(read) < len(pages)
+        break
+
+
+def test_skills_from_pages_match_whole_text(monkeypatch):
+    pages = ['Skills: Python, React\n', 'amazon web ', 'services and docker\n' + 'filler text ' * 30, 'SQL\n']
+    monkeypatch.setitem(app.app.config, 'NLP_CHUNK_CHARS', 80)
+    monkeypatch.setitem(app.app.config, 'NLP_CHUNK_OVERLAP', 25)
+    text, skills = app.extract_skills_from_pages(iter(pages))
+    assert text == ''.join(pages)
+    assert skills == app.extract_skills_with_ner_and_patterns(text)
+
+
+def test_open_pdf_pages(monkeypatch):
+    monkeypatch.setitem(app.app.config, 'PDF_MAX_PAGES', 2)
+    pages, truncated = app.open_pdf_pages(blank_pdf(3))
+    assert list(pages) == ['', ''] and truncated
+    pages, truncated = app.open_pdf_pages(blank_pdf(3), max_pages=0)
+    assert len(list(pages)) == 3 and not truncated
+
+
+def test_clip_text():
+    assert app.clip_text('short', 100) == ('short', False)
+    assert app.clip_text('x' * 500, 0) == ('x' * 500, False)
+    text = 'line one\nline two\nline three'
+    assert app.clip_text(text, 20) == ('line one\nline two\n', True)
+
+
+def blank_pdf(pages):
+    writer = PyPDF2.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=612, height=792)
+    data = io.BytesIO()
+    writer.write(data)
+    return data.getvalue()
+
+
+@pytest.mark.parametrize('max_pages, truncated', [(0, False), (3, False), (2, True)])
+def test_page_budget_sets_truncated(monkeypatch, max_pages, truncated):
+    monkeypatch.setitem(app.app.config, 'PDF_MAX_PAGES', max_pages)
+    data = blank_pdf(3)
+    # The second read is served from the text cache
+    for _ in range(2):
+        text, pages_truncated = app.extract_text_cached(io.BytesIO(data), 'resume.pdf')
+        assert pages_truncated is truncated
+        assert app.ResumeDocument(text, pages_truncated).truncated is truncated
+
+
+def test_text_and_skills_errors_like_extract_pdf():
+    text, truncated, skills = app.extract_text_and_skills(io.BytesIO(b'not a pdf'), 'resume.pdf', 'spacy')
+    assert text.startswith('Error reading PDF: ') and not truncated and skills is None
+    assert text == app.extract_pdf(b'not a pdf')[0]
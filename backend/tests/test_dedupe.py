@@ -0,0 +1,111 @@
+"""MinHash signatures and the LSH index used to spot near-duplicate resumes."""
+import io
+import pickle
+import random
+import zipfile
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+import app
+from dedupe import LSHIndex, MinHasher, similarity
+
+VOCABULARY = [f'word{i}' for i in range(400)]
+
+
+def random_text(rng, n_words=400):
+    return ' '.join(rng.choice(VOCABULARY) for _ in range(n_words))
+
+
+def edited(text, every):
+    words = text.split()
+    for i in range(0, len(words), every):
+        words[i] = 'changed'
+    return ' '.join(words)
+
+
+def test_signatures_are_deterministic():
+    text = random_text(random.Random(1))
+    assert (MinHasher().signature(text) == MinHasher().signature(text)).all()
+    assert (MinHasher().signature(text) == MinHasher().signature(text.upper().replace(' ', '\n'))).all()
+
+
+def test_too_short_texts_have_no_signature():
+    assert MinHasher().signature('four words only here') is None
+    assert MinHasher().signature('') is None
+
+
+@pytest.mark.parametrize('every', [5, 10, 40, 200])
+def test_similarity_estimates_jaccard(every):
+    rng = random.Random(every)
+    hasher = MinHasher()
+    text = random_text(rng)
+    other = edited(text, every)
+    a, b = set(hasher.shingles(text).tolist()), set(hasher.shingles(other).tolist())
+    exact = len(a & b) / len(a | b)
+    # 128 slots: the standard error is at most ~0.045
+    assert abs(similarity(hasher.signature(text), hasher.signature(other)) - exact) < 0.15
+
+
+def test_index_finds_near_duplicates_only():
+    rng = random.Random(5)
+    hasher = MinHasher()
+    index = LSHIndex(num_perm=hasher.num_perm)
+    originals = [random_text(rng) for _ in range(20)]
+    for i, text in enumerate(originals):
+        index.add(hasher.signature(text), i, context='v1')
+    for i, text in enumerate(originals):
+        match = index.query(hasher.signature(edited(text, 200)), 0.9, context='v1')
+        assert match is not None and match[0] == i and match[1] >= 0.9
+        assert index.query(hasher.signature(text), 0.9, context='v2') is None
+    assert index.query(hasher.signature(random_text(rng)), 0.5, context='v1') is None
+
+
+def test_index_keeps_newest_entries():
+    rng = random.Random(6)
+    hasher = MinHasher()
+    index = LSHIndex(num_perm=hasher.num_perm, max_entries=3)
+    texts = [random_text(rng) for _ in range(5)]
+    for i, text in enumerate(texts):
+        index.add(hasher.signature(text), i)
+    assert len(index) == 3
+    assert index.query(hasher.signature(texts[0]), 0.9) is None
+    assert index.query(hasher.signature(texts[4]), 0.9) == (4, 1.0)
+
+
+def test_bands_must_divide_slots():
+    with pytest.raises(ValueError):
+        LSHIndex(num_perm=128, bands=12)
+
+
+def docx(text):
+    body = ''.join(f'<w:p><w:r><w:t>{line}</w:t></w:r></w:p>' for line in text.split('\n'))
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, 'w') as archive:
+        archive.writestr('word/document.xml', '<w:document xmlns:w="http://schemas.openxmlformats.org/'
+                         f'wordprocessingml/2006/main"><w:body>{body}</w:body></w:document>')
+    return data.getvalue()
+
+
+def test_batch_duplicate_reuses_skills_across_process_pipe(monkeypatch):
+    # Like nlp.pipe(n_process > 1): inputs are read ahead and contexts come back pickled
+    real_batch = app.extract_skills_batch
+
+    def process_pipe(pairs, **kwargs):
+        pairs = list(pairs)
+        for skills, context in real_batch(pairs, **kwargs):
+            yield skills, pickle.loads(pickle.dumps(context))
+
+    extractions = []
+    real_extract = app.extract_skills
+    monkeypatch.setattr(app, 'extract_skills_batch', process_pipe)
+    monkeypatch.setattr(app, 'extract_skills', lambda *args: extractions.append(args) or real_extract(*args))
+    monkeypatch.setattr(app, 'resume_index', LSHIndex())
+    text = 'Jane Doe\nExperience\n' + ' '.join(f'python developer item{i} building react apps' for i in range(30))
+    files = [FileStorage(io.BytesIO(docx(body)), filename=name)
+             for name, body in [('a.docx', text), ('b.docx', text + ' phone 555 123 4567')]]
+    with app.app.test_request_context():
+        results = list(app.iter_batch_analysis(files, engine='spacy', dedupe=True))
+    assert results[1]['duplicate_of'] == 'a.docx'
+    assert results[1]['analysis']['extracted_skills'] == results[0]['analysis']['extracted_skills']
+    assert not extractions
@@ -0,0 +1,104 @@
+"""Backpressure of the batch, candidate and job description routes through nlp_pool."""
+import io
+import json
+import pickle
+import zipfile
+from concurrent.futures import Future
+
+import pytest
+
+import app
+from candidates import CandidateStore
+
+RESUMES = [
+    'Skills: Python, React and SQL\nBuilt REST APIs in Flask',
+    'Experience with Docker, Kubernetes and amazon web services',
+    'Java developer. Spring, MySQL, Git',
+]
+
+
+def docx(text):
+    body = ''.join(f'<w:p><w:r><w:t>{line}</w:t></w:r></w:p>' for line in text.split('\n'))
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, 'w') as archive:
+        archive.writestr('word/document.xml', '<w:document xmlns:w="http://schemas.openxmlformats.org/'
+                         f'wordprocessingml/2006/main"><w:body>{body}</w:body></w:document>')
+    return data.getvalue()
+
+
+def uploads():
+    return [(io.BytesIO(docx(text)), f'resume{i}.docx') for i, text in enumerate(RESUMES)]
+
+
+class InlinePool:
+    """Runs tasks in this process, pickling them like a process pool; saturated after ``capacity`` tasks."""
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity
+        self.tasks = []
+
+    def submit(self, fn, *args):
+        if self.capacity is not None and len(self.tasks) >= self.capacity:
+            raise app.PoolSaturated()
+        self.tasks.append(fn.__name__)
+        future = Future()
+        future.set_result(pickle.loads(pickle.dumps(fn(*pickle.loads(pickle.dumps(args))))))
+        return future
+
+
+@pytest.fixture
+def pool(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, 'candidate_store', CandidateStore(str(tmp_path / 'candidates.sqlite3')))
+
+    def use(capacity=None):
+        fake = InlinePool(capacity)
+        monkeypatch.setitem(app.app.config, 'NLP_POOL_WORKERS', 1)
+        monkeypatch.setattr(app, 'nlp_pool', fake)
+        return fake
+    return use
+
+
+def post_batch(path, **form):
+    return app.app.test_client().post(path, data={'files': uploads(), 'engine': 'spacy', **form},
+                                      content_type='multipart/form-data')
+
+
+def test_batch_in_pool_matches_inline(pool, monkeypatch):
+    jd = 'Requirements: Python, SQL, Docker and communication skills'
+    inline = post_batch('/analyze_batch', job_description=jd).get_json()
+    monkeypatch.setitem(app.app.config, 'NLP_BATCH_SIZE', 2)
+    fake = pool()
+    assert post_batch('/analyze_batch', job_description=jd).get_json() == inline
+    assert fake.tasks == ['_job_description_task', '_skills_batch_task', '_skills_batch_task']
+
+
+@pytest.mark.parametrize('path,form', [
+    ('/analyze_batch', {}),
+    ('/analyze_batch', {'stream': '1'}),
+    ('/candidates', {}),
+])
+def test_saturated_batch_routes_answer_503(pool, path, form):
+    pool(capacity=0)
+    query = '?stream=1' if form.pop('stream', None) else ''
+    response = post_batch(path + query, **form)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(app.app.config['NLP_POOL_RETRY_AFTER'])
+    assert app.candidate_store.since(0) == []
+
+
+@pytest.mark.parametrize('path', ['/rank', '/job_descriptions'])
+def test_saturated_job_description_routes_answer_503(pool, path):
+    pool(capacity=0)
+    response = app.app.test_client().post(path, data={'job_description': 'Python and SQL'})
+    assert response.status_code == 503
+    assert 'Retry-After' in response.headers
+
+
+def test_stream_reports_saturation_inline(pool, monkeypatch):
+    monkeypatch.setitem(app.app.config, 'NLP_STREAM_BATCH_SIZE', 1)
+    pool(capacity=1)
+    response = post_batch('/analyze_batch?stream=1')
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[0]['filename'] == 'resume0.docx' and 'analysis' in lines[0]
+    assert lines[1:] == [{'error': app.POOL_BUSY_ERROR}]
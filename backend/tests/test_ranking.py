@@ -0,0 +1,74 @@
+"""rank_candidates(): top-k selection and tie order over the candidate matrix."""
+import random
+
+import pytest
+
+import app
+from candidates import CandidateMatrix
+
+SKILLS = ['python', 'sql', 'docker', 'react', 'aws', 'java']
+
+
+class FakeStore:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def since(self, last_id):
+        return [row for row in self.rows if row[0] > last_id]
+
+
+def jd_analysis_for(required_skills):
+    required_skills = frozenset(required_skills)
+    return {
+        'required_skills': required_skills,
+        'required_bits': app.current_taxonomy().index.to_bits(required_skills),
+        'mentions_communication': False,
+    }
+
+
+def expected_ranking(rows, jd_analysis):
+    """Brute force: every candidate scored alone, best first, oldest first among equals."""
+    index = app.current_taxonomy().index
+    scored = []
+    for row_id, _, skills, _ in rows:
+        resume_bits = index.to_bits(skills) & index.common_mask
+        scored.append((-app.score_skill_match(*app.match_skill_bits(resume_bits, jd_analysis)[:3]), row_id))
+    return [row_id for _, row_id in sorted(scored)]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    def use(rows):
+        monkeypatch.setattr(app, 'candidate_store', FakeStore(rows))
+        monkeypatch.setattr(app, 'candidate_matrix', CandidateMatrix())
+    return use
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_top_k_matches_brute_force(store, seed):
+    rng = random.Random(seed)
+    # Few skills and gapped ids, so many candidates tie at every cut-off
+    row_ids = sorted(rng.sample(range(1, 1000), rng.randint(1, 40)))
+    rows = [(row_id, f'resume{row_id}.pdf', rng.sample(SKILLS, rng.randint(0, 3)), []) for row_id in row_ids]
+    store(rows)
+    jd_analysis = jd_analysis_for(rng.sample(SKILLS, rng.randint(1, 3)))
+    expected = expected_ranking(rows, jd_analysis)
+    for k in range(1, len(rows) + 2):
+        ranked, total = app.rank_candidates(jd_analysis, k)
+        assert total == len(rows)
+        assert [item['candidate_id'] for item in ranked] == expected[:k]
+        assert [item['rank'] for item in ranked] == list(range(1, min(k, len(rows)) + 1))
+
+
+def test_ties_go_to_the_oldest_candidates(store):
+    store([(row_id, f'resume{row_id}.pdf', ['python'], []) for row_id in (3, 7, 12, 20)]
+          + [(25, 'resume25.pdf', ['python', 'sql'], [])])
+    ranked, _ = app.rank_candidates(jd_analysis_for(['python', 'sql']), 3)
+    assert [item['candidate_id'] for item in ranked] == [25, 3, 7]
+    assert ranked[0]['overall_score'] == '100.00' and ranked[1]['overall_score'] == '50.00'
+    assert ranked[1]['matching_skills'] == ['python'] and ranked[1]['missing_skills'] == ['sql']
+
+
+def test_empty_pool(store):
+    store([])
+    assert app.rank_candidates(jd_analysis_for(['python']), 5) == ([], 0)
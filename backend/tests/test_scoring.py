@@ -0,0 +1,92 @@
+"""Bitset skill scoring against the set-based scoring it replaced."""
+import random
+
+import numpy as np
+import pytest
+
+import app
+
+SPECIAL = ['communication', 'software development', 'full-stack', 'web applications', 'mobile applications']
+
+
+def reference_analysis(resume_skills, required_skills, mentions_communication):
+    """The pre-bitset analyze_resume() skill comparison and score."""
+    taxonomy = app.current_taxonomy()
+    common, hard = taxonomy.common_skills, taxonomy.hard_skills
+    resume_skills = {s for s in resume_skills if s in common}
+    required = set(required_skills)
+    if mentions_communication and 'communication' in common and 'communication' in resume_skills:
+        required.add('communication')
+    matching = resume_skills & required
+    missing = required - resume_skills
+    extra = resume_skills - required
+    if 'software development' in required and resume_skills & {
+            'full-stack', 'web applications', 'mobile applications', 'software development'}:
+        matching.add('software development')
+        missing.discard('software development')
+
+    if not required:
+        score = 10.00 if resume_skills else 0.00
+    elif not required & hard:
+        score = len(matching) / len(required) * 100
+    else:
+        score = len(matching & hard) / len(required & hard) * 100
+    return {
+        'matching_skills': sorted(matching & hard),
+        'missing_skills': sorted(missing & hard),
+        'extra_skills': sorted(extra & hard),
+        'resume_skills': sorted(resume_skills),
+        'overall_score': f"{score:.2f}",
+    }
+
+
+def jd_analysis_for(required_skills, mentions_communication):
+    required_skills = frozenset(required_skills)
+    return {
+        'relevant_jd': '',
+        'skills_raw': required_skills,
+        'required_skills': required_skills,
+        'required_bits': app.current_taxonomy().index.to_bits(required_skills),
+        'mentions_communication': mentions_communication,
+    }
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_matches_reference(seed):
+    rng = random.Random(seed)
+    pool = sorted(app.current_taxonomy().common_skills) + SPECIAL * 4 + ['not a skill', 'acme corp']
+    resume_skills = set(rng.sample(pool, rng.randint(0, 25)))
+    required_skills = {s for s in rng.sample(pool, rng.randint(0, 12)) if s in app.current_taxonomy().common_skills}
+    mentions_communication = rng.random() < 0.5
+
+    results = app.analyze_resume('', 'job description', resume_skills=resume_skills,
+                                 jd_analysis=jd_analysis_for(required_skills, mentions_communication))
+    expected = reference_analysis(resume_skills, required_skills, mentions_communication)
+    assert {key: results[key] for key in expected} == expected
+
+
+def test_without_job_description_lists_common_skills():
+    results = app.analyze_resume('', resume_skills={'python', 'acme corp', 'sql'})
+    assert results['extracted_skills'] == ['python', 'sql']
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_candidate_matrix_matches_per_resume_scoring(seed):
+    rng = random.Random(seed)
+    taxonomy = app.current_taxonomy()
+    index = taxonomy.index
+    pool = sorted(taxonomy.common_skills) + SPECIAL * 4
+    candidates = [set(rng.sample(pool, rng.randint(0, 15))) for _ in range(40)] + [set()]
+    required_skills = set(rng.sample(pool, rng.randint(0, 10)))
+    jd_analysis = jd_analysis_for(required_skills, rng.random() < 0.5)
+    matrix = np.zeros((len(candidates), len(index)), dtype=np.float32)
+    for row, skills in enumerate(candidates):
+        matrix[row, [index.ids[s] for s in skills if s in index.ids]] = 1.0
+
+    scores = app.score_candidate_matrix(matrix, jd_analysis, taxonomy)
+    for score, skills in zip(scores, candidates):
+        resume_bits = index.to_bits(skills) & index.common_mask
+        expected = app.score_skill_match(*app.match_skill_bits(resume_bits, jd_analysis)[:3])
+        assert score == pytest.approx(expected, abs=1e-4)
+        results = app.analyze_resume('', 'job description', resume_skills=skills, jd_analysis=jd_analysis)
+        assert f"{score:.2f}" == results['overall_score']
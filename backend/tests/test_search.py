@@ -0,0 +1,86 @@
+"""Boolean candidate search: query parsing and the bitset index."""
+import random
+
+import pytest
+
+from candidates import CandidateIndex, parse_query
+
+
+def term(name):
+    return ('term', name)
+
+
+def test_not_binds_tighter_than_and_tighter_than_or():
+    assert parse_query('a OR b AND NOT c') == ('or', term('a'), ('and', term('b'), ('not', term('c'))))
+
+
+def test_and_spellings():
+    expected = ('and', ('and', term('python'), term('sql')), term('docker'))
+    assert parse_query('python AND sql AND docker') == expected
+    assert parse_query('python, sql, docker') == expected
+    assert parse_query('python, sql (docker)') == expected
+
+
+def test_parentheses_override_precedence():
+    assert parse_query('(a OR b) c') == ('and', ('or', term('a'), term('b')), term('c'))
+    assert parse_query('NOT (a OR b)') == ('not', ('or', term('a'), term('b')))
+
+
+def test_terms():
+    assert parse_query('React Native') == term('react native')
+    assert parse_query('"research and development"') == term('research and development')
+    assert parse_query('section:Work Experience') == term('section:work_experience')
+    assert parse_query('ReactJS', normalize=lambda t: {'reactjs': 'react'}.get(t.lower(), t)) == term('react')
+
+
+@pytest.mark.parametrize('query', ['', '   ', 'a AND', 'OR a', 'NOT', '(a', 'a)', '()', 'a OR OR b', '""', 'a ,'])
+def test_malformed_queries_raise(query):
+    with pytest.raises(ValueError):
+        parse_query(query)
+
+
+class FakeStore:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def since(self, last_id):
+        return [row for row in self.rows if row[0] > last_id]
+
+
+SKILLS = ['python', 'sql', 'docker', 'react', 'aws']
+SECTIONS = ['projects', 'skills', 'work_experience']
+
+
+def random_tree(rng, depth=0):
+    roll = rng.random()
+    if depth > 3 or roll < 0.4:
+        name = rng.choice(SKILLS + ['section:' + s for s in SECTIONS] + ['missing'])
+        return term(name)
+    if roll < 0.55:
+        return ('not', random_tree(rng, depth + 1))
+    return (rng.choice(['and', 'or']), random_tree(rng, depth + 1), random_tree(rng, depth + 1))
+
+
+def matches(tree, terms):
+    op = tree[0]
+    if op == 'term':
+        return tree[1] in terms
+    if op == 'not':
+        return not matches(tree[1], terms)
+    left, right = matches(tree[1], terms), matches(tree[2], terms)
+    return left and right if op == 'and' else left or right
+
+
+def test_index_matches_brute_force():
+    rng = random.Random(7)
+    rows = [(i, f'c{i}.pdf', rng.sample(SKILLS, rng.randint(0, 4)), rng.sample(SECTIONS, rng.randint(0, 3)))
+            for i in range(1, 150)]
+    index = CandidateIndex()
+    index.refresh(FakeStore(rows[:80]))
+    index.refresh(FakeStore(rows))  # incremental
+    for _ in range(300):
+        tree = random_tree(rng)
+        expected = [row for row in rows if matches(tree, set(row[2]) | {'section:' + s for s in row[3]})]
+        total, page = index.search(tree, offset=0, limit=len(rows))
+        assert (total, page) == (len(expected), expected)
+        assert index.search(tree, offset=5, limit=10) == (len(expected), expected[5:15])
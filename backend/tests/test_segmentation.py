@@ -0,0 +1,102 @@
+"""segment_resume() against the three per-section loops it replaced."""
+import io
+import random
+import zipfile
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+import app
+
+HEADINGS = app.ANY_SECTION + ['Contact', 'Profile']
+PROSE = [
+    'Built a dashboard for the projects team',
+    'Experience with python, sql and docker',
+    'Led the certification effort. Passed in 2021',
+    'Worked on mobile applications using react native and firebase',
+    'Awards committee member',
+    'Designed REST APIs in node.js for internal tools',
+    'Volunteer mentor at a coding bootcamp',
+]
+
+
+def reference_sections(lines):
+    """The pre-segmentation extract_resume_summary() section loops."""
+    def scan(keywords, blank_closes):
+        found, inside = [], False
+        for stripped in lines:
+            if not stripped:
+                if blank_closes:
+                    inside = False
+                continue
+            if not inside:
+                inside = app._is_section_header(stripped, keywords)
+                continue
+            if app._is_section_header(stripped, app.ANY_SECTION):
+                inside = False
+                continue
+            found.append(stripped)
+        return found
+
+    return {
+        'projects': scan(app.PROJ_HDRS, blank_closes=True),
+        'work_experience': scan(app.EXP_HDRS, blank_closes=False),
+        'certifications': scan(app.CERT_HDRS, blank_closes=False),
+    }
+
+
+def random_resume(rng):
+    lines = []
+    for _ in range(rng.randint(0, 40)):
+        kind = rng.random()
+        if kind < 0.3:
+            heading = rng.choice(HEADINGS)
+            lines.append(rng.choice([heading, heading.upper(), heading.title(), heading + ':']))
+        elif kind < 0.45:
+            lines.append('')
+        else:
+            lines.append(rng.choice(PROSE))
+    return '\n'.join(lines)
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_matches_reference(seed):
+    text = random_resume(random.Random(seed))
+    document = app.ResumeDocument(text)
+    summary = app.extract_resume_summary(document)
+    expected = reference_sections(document.lines)
+
+    assert summary['projects'] == expected['projects']
+    assert summary['work_experience'] == expected['work_experience']
+    assert summary['certifications'] == expected['certifications']
+    assert sorted(document.segments['mentioned']) == sorted(
+        section for section in app.RESUME_SECTIONS if section in text.lower())
+    # Order now follows first appearance; the old loop followed set order
+    project_text = '\n'.join(line.lower() for line in expected['projects'])
+    assert set(summary['tech_stack']) == {
+        skill for skill in app.current_taxonomy().common_skills if skill in project_text}
+
+
+def test_blank_line_closes_only_projects():
+    text = 'Projects\nChat app\n\nStray line\nExperience\nAcme Corp\n\nBeta Inc\nEducation\nBSc'
+    summary = app.extract_resume_summary(text)
+    assert summary['projects'] == ['Chat app']
+    assert summary['work_experience'] == ['Acme Corp', 'Beta Inc']
+
+
+def docx(text):
+    body = ''.join(f'<w:p><w:r><w:t>{line}</w:t></w:r></w:p>' for line in text.split('\n'))
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, 'w') as archive:
+        archive.writestr('word/document.xml', '<w:document xmlns:w="http://schemas.openxmlformats.org/'
+                         f'wordprocessingml/2006/main"><w:body>{body}</w:body></w:document>')
+    return data.getvalue()
+
+
+def test_batch_sections_are_the_non_empty_segments():
+    # The Projects heading has no lines and "projects" is otherwise only in prose
+    text = '\n'.join(['Jane Doe', 'Work Experience', PROSE[0], PROSE[2], '', 'Projects', '', 'Education'])
+    upload = FileStorage(io.BytesIO(docx(text)), 'resume.docx')
+    [result] = app.iter_batch_analysis([upload], engine='fast', sections=True)
+    assert result['analysis']['sections'] == ['work_experience']
+    assert 'projects' in result['analysis']['sections_found']
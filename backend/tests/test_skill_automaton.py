@@ -0,0 +1,37 @@
+"""The Aho-Corasick automaton behind the fast skill engine."""
+import random
+
+import pytest
+
+import app
+from skill_automaton import SkillAutomaton
+
+
+def test_substring_mode_finds_every_occurrence():
+    rng = random.Random(3)
+    phrases = ['he', 'she', 'his', 'hers', 'ushers', 's', 'c++', 'node.js']
+    automaton = SkillAutomaton({phrase: phrase for phrase in phrases}, word_boundaries=False)
+    for _ in range(200):
+        text = ''.join(rng.choice('hersuic+.nodjs ') for _ in range(rng.randint(0, 60)))
+        expected = sorted((i, i + len(p), p) for p in phrases for i in range(len(text)) if text.startswith(p, i))
+        assert sorted(automaton.finditer(text)) == expected
+
+
+@pytest.mark.parametrize('text,expected', [
+    ('html/css', {'html', 'css'}),
+    ('php/mysql', {'php', 'sql'}),
+    ('git/github', {'git'}),
+    ('node.js/express', {'node.js'}),
+    ('python/java', {'python', 'java'}),
+    ('sql-based reporting', {'sql'}),
+    ('html5/css3', {'html', 'css'}),
+    ('c++ and c#', {'c++'}),
+    ('c/c++', {'c', 'c++'}),
+    ('a c program', {'c'}),
+    ('mysql-8 server', set()),
+    ('sql-2019', set()),
+    ('java/8', set()),
+    ('reactjs and pythonic code', set()),
+])
+def test_fast_engine_word_boundaries(text, expected):
+    assert app.extract_skills_fast(text) == expected